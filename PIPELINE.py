@@ -3,8 +3,14 @@
 import time
 import uuid
 import json
+import queue
+import hashlib
 import logging
-from typing import Dict, Any
+import threading
+import concurrent.futures
+from collections import deque, OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, Any, List, Callable, Optional, Tuple, Iterator
 
 # Hypothetical Birkini SDK components
 from birkini.sdk import (
@@ -17,13 +23,46 @@ from birkini.sdk import (
     PrivacyPreservingAnalyzer
 )
 
+from proof_cache import ProofCache, dataset_fingerprint
+from result_export import ResultExporter
+
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("BirkiniPipeline")
 
+class IncrementalCommitment:
+    """
+    Builds a dataset commitment one chunk at a time: each chunk's records are
+    hashed canonically and folded into a running SHA-256, so only the current
+    chunk and the per-chunk digests are ever held in memory.
+    """
+
+    def __init__(self):
+        self._hasher = hashlib.sha256()
+        self.chunk_hashes: List[str] = []
+        self.record_count = 0
+
+    def update(self, records: List[Any]) -> str:
+        digest = hashlib.sha256(json.dumps(records, sort_keys=True, default=str).encode()).hexdigest()
+        self._hasher.update(bytes.fromhex(digest))
+        self.chunk_hashes.append(digest)
+        self.record_count += len(records)
+        return digest
+
+    def manifest(self, metadata: Dict[str, Any]) -> Dict[str, Any]:
+        """Small stand-in for the full dataset that the proof engine and MCP can work on."""
+        return {
+            "metadata": metadata,
+            "chunk_count": len(self.chunk_hashes),
+            "record_count": self.record_count,
+            "chunk_hashes": list(self.chunk_hashes),
+            "commitment": self._hasher.hexdigest(),
+        }
+
 class BirkiniPipeline:
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, proof_cache: Optional[ProofCache] = None):
         self.api_key = api_key
+        self.proof_cache = proof_cache
         self.client = None
         self.mcp_client = None
         self.zk_engine = None
@@ -31,6 +70,15 @@ class BirkiniPipeline:
         self.dataset = None
         self.proof = None
         self.context_id = str(uuid.uuid4())
+        self._connect_lock = threading.Lock()
+        self._connected = False
+        self._query_builder = None
+        self._analyzer = None
+        self._query_lock = threading.Lock()
+        self.query_cache_size = 1024
+        self.query_cache: "OrderedDict[Tuple[str, str, str], Dict[str, Any]]" = OrderedDict()
+        self.query_cache_hits = 0
+        self.query_cache_misses = 0
 
     def initialize_clients(self):
         logger.info("Initializing Birkini core and MCP clients...")
@@ -39,11 +87,36 @@ class BirkiniPipeline:
         self.zk_engine = ZKProofEngine()
         self.zkmcp = ZKMCPModule(self.mcp_client)
 
+    # --- Per-dataset building blocks (shared by the sequential API and StagedPipelineRunner) ---
+
+    def load_dataset(self, dataset_id: str) -> Dict[str, Any]:
+        return DatasetFetcher(self.client).fetch(dataset_id)
+
+    def prove_dataset(self, dataset: Dict[str, Any]) -> Any:
+        if self.proof_cache is None:
+            return self.zk_engine.generate_proof(dataset)
+        return self.proof_cache.get_or_create(dataset, self.zk_engine.generate_proof)
+
+    def connect_mcp(self):
+        """Connect the MCP client once, however many datasets are registered through it."""
+        with self._connect_lock:
+            if not self._connected:
+                self.mcp_client.connect()
+                self._connected = True
+
+    def publish_context(self, context_id: str, dataset: Dict[str, Any]):
+        self.mcp_client.register_resource(context_id, dataset)
+
+    def bind_context_proof(self, context_id: str, proof: Any):
+        self.zkmcp.enable_privacy_mode()
+        self.zkmcp.bind_proof(context_id, proof)
+
+    # --- Sequential single-dataset API ---
+
     def fetch_and_prepare_data(self, dataset_id: str) -> bool:
         try:
             logger.info(f"Fetching dataset with ID: {dataset_id}")
-            fetcher = DatasetFetcher(self.client)
-            self.dataset = fetcher.fetch(dataset_id)
+            self.dataset = self.load_dataset(dataset_id)
             logger.info(f"Dataset fetched: {self.dataset['metadata']['title']}")
             return True
         except Exception as e:
@@ -53,8 +126,10 @@ class BirkiniPipeline:
     def apply_zero_knowledge_proof(self):
         try:
             logger.info("Applying zero-knowledge proof to dataset...")
-            self.proof = self.zk_engine.generate_proof(self.dataset)
+            self.proof = self.prove_dataset(self.dataset)
             logger.info("Zero-knowledge proof generated successfully.")
+            if self.proof_cache is not None:
+                logger.info(f"Proof cache stats: {self.proof_cache.stats()}")
         except Exception as e:
             logger.error(f"ZK proof generation failed: {e}")
             raise
@@ -62,8 +137,8 @@ class BirkiniPipeline:
     def register_context(self):
         try:
             logger.info("Registering dataset in MCP with context ID...")
-            self.mcp_client.connect()
-            self.mcp_client.register_resource(self.context_id, self.dataset)
+            self.connect_mcp()
+            self.publish_context(self.context_id, self.dataset)
             logger.info(f"Resource registered with context: {self.context_id}")
         except Exception as e:
             logger.error(f"Failed to register resource in MCP: {e}")
@@ -72,38 +147,357 @@ class BirkiniPipeline:
     def enable_zkmcp_privacy(self):
         try:
             logger.info("Enabling ZKMCP privacy layer...")
-            self.zkmcp.enable_privacy_mode()
-            self.zkmcp.bind_proof(self.context_id, self.proof)
+            self.bind_context_proof(self.context_id, self.proof)
             logger.info("ZKMCP privacy mode active.")
         except Exception as e:
             logger.error(f"Failed to activate ZKMCP: {e}")
             raise
 
+    # --- Streaming single-dataset API ---
+
+    def iter_dataset_chunks(self, dataset_id: str, chunk_size: int) -> Iterator[Dict[str, Any]]:
+        """
+        Yield {"metadata", "records"} chunks. Uses the fetcher's iter_chunks
+        when the SDK provides it; otherwise slices a full fetch, which keeps
+        the interface but not the memory savings.
+        """
+        fetcher = DatasetFetcher(self.client)
+        if hasattr(fetcher, "iter_chunks"):
+            yield from fetcher.iter_chunks(dataset_id, chunk_size=chunk_size)
+            return
+
+        logger.warning("DatasetFetcher has no iter_chunks; falling back to a full fetch")
+        dataset = fetcher.fetch(dataset_id)
+        records = dataset.get("records", [])
+        for start in range(0, max(len(records), 1), chunk_size):
+            yield {"metadata": dataset["metadata"], "records": records[start:start + chunk_size]}
+
+    def stream_and_prove(self, dataset_id: str, chunk_size: int = 10000, max_chunks_in_flight: int = 2) -> Dict[str, Any]:
+        """
+        Fetch a dataset chunk by chunk on a background thread, fold each chunk
+        into an IncrementalCommitment and register it with MCP as it arrives,
+        then prove and register the resulting manifest. Peak memory is bounded
+        by chunk_size * (max_chunks_in_flight + 1) records.
+        """
+        chunks: queue.Queue = queue.Queue(maxsize=max_chunks_in_flight)
+        done = object()
+        stop = threading.Event()
+        fetch_error: List[Exception] = []
+
+        def offer(item) -> bool:
+            # Never block forever: the consumer may have given up on the stream
+            while not stop.is_set():
+                try:
+                    chunks.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def produce():
+            try:
+                for chunk in self.iter_dataset_chunks(dataset_id, chunk_size):
+                    if not offer(chunk):
+                        return
+            except Exception as e:
+                fetch_error.append(e)
+            finally:
+                offer(done)
+
+        logger.info(f"Streaming dataset {dataset_id} in chunks of {chunk_size} records...")
+        producer = threading.Thread(target=produce, daemon=True)
+        producer.start()
+
+        commitment = IncrementalCommitment()
+        metadata: Dict[str, Any] = {}
+        try:
+            self.connect_mcp()
+            while True:
+                chunk = chunks.get()
+                if chunk is done:
+                    break
+                metadata = chunk["metadata"]
+                index = len(commitment.chunk_hashes)
+                digest = commitment.update(chunk["records"])
+                self.publish_context(f"{self.context_id}:{index}", {"chunk_index": index, "digest": digest, **chunk})
+        finally:
+            stop.set()
+            while True:
+                try:
+                    chunks.get_nowait()
+                except queue.Empty:
+                    break
+            producer.join()
+        if fetch_error:
+            logger.error(f"Failed to stream dataset: {fetch_error[0]}")
+            raise fetch_error[0]
+
+        self.dataset = commitment.manifest(metadata)
+        self.proof = self.prove_dataset(self.dataset)
+        self.publish_context(self.context_id, self.dataset)
+        logger.info(
+            f"Streamed {self.dataset['record_count']} records in {self.dataset['chunk_count']} chunks; "
+            f"commitment {self.dataset['commitment']} registered with context: {self.context_id}"
+        )
+        return self.dataset
+
+    def run_many(self, dataset_ids: List[str], max_datasets: int = 4, max_workers: int = 8) -> List["PipelineRun"]:
+        """Push many datasets through fetch/proof/register/bind concurrently. See StagedPipelineRunner."""
+        runner = StagedPipelineRunner(self, max_datasets=max_datasets, max_workers=max_workers)
+        runs = runner.run(dataset_ids)
+        runner.log_stage_stats()
+        return runs
+
+    def _query_components(self) -> Tuple[Any, Any]:
+        """Builder and analyzer are created once per pipeline and shared by every query."""
+        with self._query_lock:
+            if self._query_builder is None:
+                self._query_builder = ContextualQueryBuilder(self.mcp_client)
+                self._analyzer = PrivacyPreservingAnalyzer(self.mcp_client, self.zk_engine)
+            return self._query_builder, self._analyzer
+
+    def _query_key(self, query: str) -> Tuple[str, str, str]:
+        return self.context_id, dataset_fingerprint(self.proof), query
+
+    def _cached_query_result(self, key: Tuple[str, str, str]) -> Optional[Dict[str, Any]]:
+        with self._query_lock:
+            result = self.query_cache.get(key)
+            if result is None:
+                self.query_cache_misses += 1
+                return None
+            self.query_cache.move_to_end(key)
+            self.query_cache_hits += 1
+            return dict(result)
+
+    def _execute_query(self, query: str, key: Tuple[str, str, str]) -> Dict[str, Any]:
+        builder, analyzer = self._query_components()
+        contextual_query = builder.build(query, self.context_id)
+        result = analyzer.analyze(contextual_query)
+        with self._query_lock:
+            self.query_cache[key] = result
+            self.query_cache.move_to_end(key)
+            while len(self.query_cache) > self.query_cache_size:
+                self.query_cache.popitem(last=False)
+        return dict(result)
+
     def run_contextual_query(self, query: str) -> Dict[str, Any]:
         try:
-            logger.info("Building contextual query...")
-            builder = ContextualQueryBuilder(self.mcp_client)
-            contextual_query = builder.build(query, self.context_id)
-            logger.info("Executing query with privacy-preserving layer...")
+            key = self._query_key(query)
+            cached = self._cached_query_result(key)
+            if cached is not None:
+                logger.info("Contextual query served from cache.")
+                return cached
 
-            analyzer = PrivacyPreservingAnalyzer(self.mcp_client, self.zk_engine)
-            result = analyzer.analyze(contextual_query)
+            logger.info("Executing contextual query with privacy-preserving layer...")
+            result = self._execute_query(query, key)
             logger.info("Query executed successfully.")
             return result
         except Exception as e:
             logger.error(f"Failed to execute contextual query: {e}")
             return {"error": str(e)}
 
-    def export_results(self, result: Dict[str, Any]):
-        timestamp = int(time.time())
-        filename = f"birkini_output_{timestamp}.json"
-        with open(filename, "w") as f:
-            json.dump(result, f, indent=4)
-        logger.info(f"Results exported to {filename}")
+    def run_contextual_queries(self, queries: List[str], max_concurrency: int = 4) -> List[Dict[str, Any]]:
+        """
+        Run many queries against the current context. Identical queries run
+        once, cached (context_id, proof, query) results are reused, and the
+        rest execute concurrently on up to max_concurrency threads. Results are
+        returned in input order; failures come back as {"error": ...} like
+        run_contextual_query and are not cached.
+        """
+        unique = list(dict.fromkeys(queries))
+        results: Dict[str, Dict[str, Any]] = {}
+        pending: List[Tuple[str, Tuple[str, str, str]]] = []
+        for query in unique:
+            key = self._query_key(query)
+            cached = self._cached_query_result(key)
+            if cached is not None:
+                results[query] = cached
+            else:
+                pending.append((query, key))
+
+        if pending:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, min(max_concurrency, len(pending)))) as executor:
+                futures = {executor.submit(self._execute_query, query, key): query for query, key in pending}
+                for future in concurrent.futures.as_completed(futures):
+                    query = futures[future]
+                    try:
+                        results[query] = future.result()
+                    except Exception as e:
+                        logger.error(f"Failed to execute contextual query: {e}")
+                        results[query] = {"error": str(e)}
+
+        logger.info(
+            f"Ran {len(queries)} contextual queries: {len(unique)} unique, {len(pending)} executed, "
+            f"{len(unique) - len(pending)} from cache"
+        )
+        return [dict(results[query]) for query in queries]
+
+    def export_results(self, result: Dict[str, Any], mode: str = "json", output_dir: str = ".") -> Dict[str, Any]:
+        """
+        Export a query result atomically to a collision-free file. Modes:
+        json, ndjson, ndjson.gz, ndjson.zst, parquet, arrow (see result_export).
+        Returns the path, record count, bytes written and throughput.
+        """
+        return ResultExporter(output_dir=output_dir).export(result, mode=mode)
+
+# === Staged, concurrent execution ===
+
+@dataclass
+class PipelineRun:
+    """State of one dataset moving through the staged pipeline."""
+    dataset_id: str
+    context_id: str = field(default_factory=lambda: str(uuid.uuid4()))
+    dataset: Optional[Dict[str, Any]] = None
+    proof: Any = None
+    timings: Dict[str, float] = field(default_factory=dict)
+    error: Optional[str] = None
+    failed_stage: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+@dataclass
+class Stage:
+    name: str
+    func: Callable[[BirkiniPipeline, PipelineRun], None]
+    depends_on: Tuple[str, ...] = ()
+
+def _fetch_stage(pipeline: BirkiniPipeline, run: PipelineRun):
+    run.dataset = pipeline.load_dataset(run.dataset_id)
+
+def _proof_stage(pipeline: BirkiniPipeline, run: PipelineRun):
+    run.proof = pipeline.prove_dataset(run.dataset)
+
+def _connect_stage(pipeline: BirkiniPipeline, run: PipelineRun):
+    pipeline.connect_mcp()
+
+def _register_stage(pipeline: BirkiniPipeline, run: PipelineRun):
+    pipeline.publish_context(run.context_id, run.dataset)
+
+def _privacy_stage(pipeline: BirkiniPipeline, run: PipelineRun):
+    pipeline.bind_context_proof(run.context_id, run.proof)
+
+# MCP connect/register only waits for the fetch, so it overlaps with proof generation.
+DEFAULT_STAGES: List[Stage] = [
+    Stage("fetch", _fetch_stage),
+    Stage("connect", _connect_stage),
+    Stage("proof", _proof_stage, ("fetch",)),
+    Stage("register", _register_stage, ("fetch", "connect")),
+    Stage("privacy", _privacy_stage, ("proof", "register")),
+]
+
+class StagedPipelineRunner:
+    """
+    Runs pipeline stages as a DAG. Every stage whose dependencies are done is
+    submitted to a shared thread pool, so independent stages of one dataset
+    overlap and up to `max_datasets` datasets are in flight at once. A stage
+    failure stops the remaining stages of that dataset only.
+    """
+
+    def __init__(self, pipeline: BirkiniPipeline, stages: Optional[List[Stage]] = None,
+                 max_datasets: int = 4, max_workers: int = 8):
+        self.pipeline = pipeline
+        self.stages = {stage.name: stage for stage in (stages or DEFAULT_STAGES)}
+        self.max_datasets = max_datasets
+        self.max_workers = max_workers
+        self.stage_times: Dict[str, List[float]] = {name: [] for name in self.stages}
+        self._validate()
+
+    def _validate(self):
+        visiting, done = set(), set()
+
+        def visit(name: str):
+            if name in done:
+                return
+            if name in visiting:
+                raise ValueError(f"Pipeline stages contain a cycle at '{name}'")
+            if name not in self.stages:
+                raise ValueError(f"Unknown pipeline stage dependency: '{name}'")
+            visiting.add(name)
+            for dependency in self.stages[name].depends_on:
+                visit(dependency)
+            visiting.discard(name)
+            done.add(name)
+
+        for name in self.stages:
+            visit(name)
+
+    def _timed(self, stage: Stage, run: PipelineRun):
+        start = time.perf_counter()
+        try:
+            stage.func(self.pipeline, run)
+        finally:
+            run.timings[stage.name] = time.perf_counter() - start
+
+    def run(self, dataset_ids: List[str]) -> List[PipelineRun]:
+        runs = [PipelineRun(dataset_id) for dataset_id in dataset_ids]
+        waiting = deque(runs)
+        completed: Dict[int, set] = {}
+        submitted: Dict[int, set] = {}
+        futures: Dict[concurrent.futures.Future, Tuple[PipelineRun, Stage]] = {}
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            def submit_ready(run: PipelineRun):
+                if not run.ok:
+                    return
+                for stage in self.stages.values():
+                    if stage.name in submitted[id(run)]:
+                        continue
+                    if all(dep in completed[id(run)] for dep in stage.depends_on):
+                        submitted[id(run)].add(stage.name)
+                        futures[executor.submit(self._timed, stage, run)] = (run, stage)
+
+            active = 0
+            while waiting or futures:
+                while waiting and active < self.max_datasets:
+                    run = waiting.popleft()
+                    completed[id(run)], submitted[id(run)] = set(), set()
+                    active += 1
+                    logger.info(f"Starting staged run for dataset {run.dataset_id}")
+                    submit_ready(run)
+
+                done, _ = concurrent.futures.wait(futures, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    run, stage = futures.pop(future)
+                    error = future.exception()
+                    if error is not None and run.ok:
+                        run.error, run.failed_stage = str(error), stage.name
+                        logger.error(f"Stage '{stage.name}' failed for dataset {run.dataset_id}: {error}")
+                    elif error is None:
+                        completed[id(run)].add(stage.name)
+                        self.stage_times[stage.name].append(run.timings[stage.name])
+                        submit_ready(run)
+
+                    in_flight = any(r is run for r, _ in futures.values())
+                    if not in_flight:
+                        active -= 1
+                        status = "completed" if run.ok else f"failed at '{run.failed_stage}'"
+                        logger.info(f"Staged run for dataset {run.dataset_id} {status}")
+        return runs
+
+    def stage_stats(self) -> Dict[str, Dict[str, float]]:
+        stats = {}
+        for name, times in self.stage_times.items():
+            if times:
+                stats[name] = {
+                    "count": len(times),
+                    "total_s": sum(times),
+                    "mean_s": sum(times) / len(times),
+                    "max_s": max(times),
+                }
+        return stats
+
+    def log_stage_stats(self):
+        for name, stats in self.stage_stats().items():
+            logger.info(
+                f"Stage '{name}': {stats['count']} runs, mean {stats['mean_s'] * 1000:.1f} ms, "
+                f"max {stats['max_s'] * 1000:.1f} ms"
+            )
 
 # Example usage
 if __name__ == "__main__":
-    pipeline = BirkiniPipeline(api_key="your_api_key_here")
+    pipeline = BirkiniPipeline(api_key="your_api_key_here", proof_cache=ProofCache())
     pipeline.initialize_clients()
 
     if pipeline.fetch_and_prepare_data(dataset_id="sample_dataset_123"):
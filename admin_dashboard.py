@@ -2,9 +2,11 @@ import os
 import logging
 import pandas as pd
 from flask import Flask, jsonify, request
-from sqlalchemy import create_engine, text
+from sqlalchemy import text
 from datetime import datetime
 
+from db_engine import get_engine, pool_stats
+
 # Flask app setup
 app = Flask(__name__)
 
@@ -14,7 +16,7 @@ logger = logging.getLogger(__name__)
 
 # Database connection
 DATABASE_URI = os.environ.get('DATABASE_URI', 'sqlite:///birkini.db')
-engine = create_engine(DATABASE_URI)
+engine = get_engine(DATABASE_URI)
 
 def get_system_logs() -> list | dict:
     """Read system logs from JSON log file"""
@@ -69,5 +71,9 @@ def get_system_stats():
         logger.error(f"Failed to get stats: {e}")
         return jsonify({"error": "Could not fetch system stats."}), 500
 
+@app.route("/admin/db/pool", methods=["GET"])
+def get_pool_stats():
+    return jsonify(pool_stats(DATABASE_URI)), 200
+
 if __name__ == "__main__":
     app.run(debug=True)
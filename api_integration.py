@@ -3,7 +3,8 @@ import json
 import logging
 import requests
 import pandas as pd
-from sqlalchemy import create_engine
+
+from db_engine import get_engine
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='[%(levelname)s] %(message)s')
@@ -12,8 +13,8 @@ logging.basicConfig(level=logging.INFO, format='[%(levelname)s] %(message)s')
 API_URL = os.getenv('API_URL', 'https://api.example.com/data')
 DATABASE_URI = os.getenv('DATABASE_URI', 'sqlite:///birkini.db')
 
-# Create SQLAlchemy engine
-engine = create_engine(DATABASE_URI)
+# Shared, pooled SQLAlchemy engine
+engine = get_engine(DATABASE_URI)
 
 def fetch_data_from_api():
     """Fetch data from an external API"""
@@ -0,0 +1,141 @@
+import re
+import hmac
+import hashlib
+from typing import Any, Iterable, Sequence
+
+from cryptography.fernet import Fernet
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+# Metadata table recording, per table, which columns are encrypted and which carry a blind index
+METADATA_TABLE = "encryption_columns"
+BLIND_INDEX_SUFFIX = "_bidx"
+_IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+def _identifier(name: str) -> str:
+    if not _IDENTIFIER.match(name):
+        raise ValueError(f"Invalid SQL identifier: {name!r}")
+    return name
+
+def derive_blind_index_key(encryption_key: str | bytes) -> bytes:
+    """Derive a separate HMAC key from the Fernet key when no BLIND_INDEX_KEY is configured."""
+    key = encryption_key.encode() if isinstance(encryption_key, str) else encryption_key
+    return hmac.new(key, b"birkini-blind-index-v1", hashlib.sha256).digest()
+
+def blind_index(value: Any, key: bytes) -> str:
+    """Deterministic keyed HMAC of a value, usable in equality predicates without revealing the value."""
+    return hmac.new(key, str(value).strip().encode(), hashlib.sha256).hexdigest()
+
+class ColumnEncryptor:
+    """
+    Column-level encryption for one table. Declared columns are stored as
+    Fernet tokens; indexed columns also get a `<column>_bidx` HMAC column
+    with a real database index, so `column = :value` lookups use an index
+    seek instead of decrypting the whole table. Column settings are recorded
+    in the `encryption_columns` metadata table.
+    """
+
+    def __init__(self, engine: Engine, cipher: Fernet, blind_index_key: bytes, table_name: str,
+                 encrypted_columns: Sequence[str] = (), indexed_columns: Sequence[str] = ()):
+        self.engine = engine
+        self.cipher = cipher
+        self.blind_index_key = blind_index_key
+        self.table_name = _identifier(table_name)
+        self.encrypted_columns = [_identifier(c) for c in encrypted_columns]
+        self.indexed_columns = [_identifier(c) for c in indexed_columns]
+        unknown = set(self.indexed_columns) - set(self.encrypted_columns)
+        if unknown:
+            raise ValueError(f"Blind-indexed columns must also be encrypted: {sorted(unknown)}")
+
+    @classmethod
+    def from_metadata(cls, engine: Engine, cipher: Fernet, blind_index_key: bytes, table_name: str) -> "ColumnEncryptor":
+        metadata = load_encryption_metadata(engine, table_name)
+        return cls(
+            engine, cipher, blind_index_key, table_name,
+            encrypted_columns=[c for c, m in metadata.items() if m["encrypted"]],
+            indexed_columns=[c for c, m in metadata.items() if m["blind_index"]],
+        )
+
+    def create_table(self, columns: Sequence[str]):
+        """Create the table (TEXT columns plus blind-index columns) and its indexes, and record metadata."""
+        definitions = [f"{_identifier(c)} TEXT" for c in columns]
+        definitions += [f"{c}{BLIND_INDEX_SUFFIX} TEXT" for c in self.indexed_columns]
+        with self.engine.begin() as connection:
+            connection.execute(text(f"CREATE TABLE IF NOT EXISTS {self.table_name} ({', '.join(definitions)})"))
+            for column in self.indexed_columns:
+                connection.execute(text(
+                    f"CREATE INDEX IF NOT EXISTS idx_{self.table_name}_{column}{BLIND_INDEX_SUFFIX} "
+                    f"ON {self.table_name} ({column}{BLIND_INDEX_SUFFIX})"
+                ))
+        self.register()
+
+    def register(self):
+        with self.engine.begin() as connection:
+            connection.execute(text(
+                f"CREATE TABLE IF NOT EXISTS {METADATA_TABLE} ("
+                "table_name TEXT NOT NULL, column_name TEXT NOT NULL, "
+                "encrypted INTEGER NOT NULL, blind_index INTEGER NOT NULL, "
+                "PRIMARY KEY (table_name, column_name))"
+            ))
+            connection.execute(
+                text(f"DELETE FROM {METADATA_TABLE} WHERE table_name = :table_name"), {"table_name": self.table_name})
+            if self.encrypted_columns:
+                connection.execute(
+                    text(f"INSERT INTO {METADATA_TABLE} (table_name, column_name, encrypted, blind_index) "
+                         "VALUES (:table_name, :column_name, :encrypted, :blind_index)"),
+                    [{"table_name": self.table_name, "column_name": c, "encrypted": 1,
+                      "blind_index": int(c in self.indexed_columns)} for c in self.encrypted_columns]
+                )
+
+    def encrypt_row(self, row: dict) -> dict:
+        stored = {}
+        for column, value in row.items():
+            if column in self.encrypted_columns and value is not None:
+                stored[column] = self.cipher.encrypt(str(value).strip().encode()).decode()
+                if column in self.indexed_columns:
+                    stored[f"{column}{BLIND_INDEX_SUFFIX}"] = blind_index(value, self.blind_index_key)
+            else:
+                stored[column] = value
+                if column in self.indexed_columns:
+                    stored[f"{column}{BLIND_INDEX_SUFFIX}"] = None
+        return stored
+
+    def decrypt_row(self, row: dict) -> dict:
+        decrypted = {k: v for k, v in row.items() if not k.endswith(BLIND_INDEX_SUFFIX)}
+        for column in self.encrypted_columns:
+            if decrypted.get(column) is not None:
+                decrypted[column] = self.cipher.decrypt(decrypted[column].encode()).decode()
+        return decrypted
+
+    def insert_rows(self, rows: Iterable[dict]) -> int:
+        stored = [self.encrypt_row(row) for row in rows]
+        if not stored:
+            return 0
+        columns = [_identifier(c) for c in stored[0]]
+        statement = text(
+            f"INSERT INTO {self.table_name} ({', '.join(columns)}) VALUES ({', '.join(':' + c for c in columns)})"
+        )
+        with self.engine.begin() as connection:
+            connection.execute(statement, stored)
+        return len(stored)
+
+    def lookup(self, column: str, value: Any) -> list[dict]:
+        """Rows where `column` equals `value`, found through the blind index and decrypted."""
+        if column not in self.indexed_columns:
+            raise ValueError(f"Column '{column}' has no blind index on '{self.table_name}'")
+        query = text(f"SELECT * FROM {self.table_name} WHERE {column}{BLIND_INDEX_SUFFIX} = :digest")
+        with self.engine.connect() as connection:
+            rows = connection.execute(query, {"digest": blind_index(value, self.blind_index_key)}).mappings().all()
+        # Confirm after decryption so an HMAC collision can never return the wrong row.
+        expected = str(value).strip()
+        return [row for row in (self.decrypt_row(dict(r)) for r in rows) if row[column] == expected]
+
+def load_encryption_metadata(engine: Engine, table_name: str) -> dict[str, dict[str, bool]]:
+    """{column: {"encrypted": bool, "blind_index": bool}} for a table, empty if nothing is recorded."""
+    query = text(f"SELECT column_name, encrypted, blind_index FROM {METADATA_TABLE} WHERE table_name = :table_name")
+    try:
+        with engine.connect() as connection:
+            rows = connection.execute(query, {"table_name": _identifier(table_name)}).all()
+    except Exception:
+        return {}
+    return {column: {"encrypted": bool(encrypted), "blind_index": bool(indexed)} for column, encrypted, indexed in rows}
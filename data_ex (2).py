@@ -3,6 +3,13 @@ import json
 import csv
 from pathlib import Path
 
+try:
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:  # optional: only needed for Parquet and Arrow exports
+    pyarrow = None
+
 class DataExporter:
     def __init__(self, data):
         if not isinstance(data, list) or not all(isinstance(d, dict) for d in data):
@@ -26,6 +33,25 @@ class DataExporter:
         self.df.to_excel(file_name, index=False)
         print(f"[✓] Exported to Excel: {file_name}")
 
+    def _arrow_table(self):
+        if pyarrow is None:
+            raise RuntimeError("pyarrow is required for Parquet and Arrow exports")
+        return pyarrow.Table.from_pandas(self.df, preserve_index=False)
+
+    def export_parquet(self, file_name: str, row_group_size: int = 100000, compression: str = "zstd"):
+        """Export data to a Parquet file, written in row groups of `row_group_size` rows."""
+        table = self._arrow_table()
+        pyarrow.parquet.write_table(table, file_name, row_group_size=row_group_size, compression=compression)
+        print(f"[✓] Exported to Parquet: {file_name}")
+
+    def export_arrow(self, file_name: str, batch_size: int = 100000):
+        """Export data to an Arrow IPC file in record batches of `batch_size` rows."""
+        table = self._arrow_table()
+        with pyarrow.ipc.new_file(file_name, table.schema) as writer:
+            for batch in table.to_batches(max_chunksize=batch_size):
+                writer.write_batch(batch)
+        print(f"[✓] Exported to Arrow: {file_name}")
+
     def export_custom_csv(self, file_name: str, delimiter: str = ';'):
         """Export data to a CSV file with a custom delimiter."""
         with open(file_name, mode='w', newline='') as file:
@@ -46,5 +72,7 @@ if __name__ == "__main__":
     exporter.export_csv("users_data.csv")
     exporter.export_json("users_data.json")
     exporter.export_excel("users_data.xlsx")
+    if pyarrow is not None:
+        exporter.export_parquet("users_data.parquet")
     exporter.export_custom_csv("users_data_custom.csv", delimiter=';')
 
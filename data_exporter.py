@@ -1,45 +1,242 @@
 import os
+import time
+import shutil
+import tempfile
+import itertools
+import concurrent.futures
 import pandas as pd
-from sqlalchemy import create_engine
+from sqlalchemy import inspect, text
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:  # optional: only needed for "parquet" and "arrow"
+    pyarrow = None
+
+import db_engine
+from db_engine import get_engine
 
 # Load environment configurations
 DATABASE_URI = os.environ.get("DATABASE_URI", "sqlite:///birkini.db")
 
-# Create SQLAlchemy engine
-engine = create_engine(DATABASE_URI)
+# Shared, pooled SQLAlchemy engine
+engine = get_engine(DATABASE_URI)
+
+# Rows fetched and written per step; peak memory is bounded by one chunk per reader
+DEFAULT_CHUNKSIZE = 50000
+
+# Chunks read ahead to settle columnar column types that are all NULL in the first chunk
+SCHEMA_LOOKAHEAD_CHUNKS = 8
+
+def _read_chunks(query: str, params: dict | None = None, chunksize: int = DEFAULT_CHUNKSIZE, uri: str = DATABASE_URI):
+    """Yield DataFrames of up to `chunksize` rows using a server-side cursor where the driver supports one."""
+    with get_engine(uri).connect() as connection:
+        connection = connection.execution_options(stream_results=True)
+        yield from pd.read_sql(text(query), connection, params=params, chunksize=chunksize)
+
+def _write_chunks(chunks, file, format: str, header: bool = True) -> int:
+    rows = 0
+    for chunk in chunks:
+        if format == "csv":
+            chunk.to_csv(file, index=False, header=header and rows == 0)
+        elif format == "json":
+            if len(chunk):
+                file.write(chunk.to_json(orient="records", lines=True, date_format="iso").rstrip("\n") + "\n")
+        else:
+            raise ValueError("Unsupported format. Use 'csv' or 'json'.")
+        rows += len(chunk)
+    return rows
 
-def export_to_csv(table_name: str, file_name: str) -> None:
+def _atomic_export(file_name: str, write, binary: bool = False) -> int:
+    """Run write(file) against a temp file next to `file_name` and rename it into place on success."""
+    directory = os.path.dirname(os.path.abspath(file_name))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp_export_")
+    try:
+        with (os.fdopen(fd, "wb") if binary else os.fdopen(fd, "w", newline="", encoding="utf-8")) as file:
+            rows = write(file)
+        os.replace(tmp_path, file_name)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return rows
+
+def _columnar_schema(tables):
+    """
+    Unify and widen chunk schemas until no column is all NULL (at most
+    SCHEMA_LOOKAHEAD_CHUNKS chunks). Columns still all NULL become strings.
+    Returns (schema, buffered tables).
+    """
+    buffered = []
+    schema = None
+    for table in tables:
+        buffered.append(table)
+        try:
+            schema = table.schema if schema is None else pyarrow.unify_schemas(
+                [schema, table.schema], promote_options="permissive")
+        except (pyarrow.ArrowInvalid, pyarrow.ArrowTypeError) as e:
+            raise ValueError(f"Chunks have incompatible column types: {e}") from e
+        if not any(pyarrow.types.is_null(f.type) for f in schema) or len(buffered) >= SCHEMA_LOOKAHEAD_CHUNKS:
+            break
+    if schema is not None:
+        schema = pyarrow.schema([f.with_type(pyarrow.string()) if pyarrow.types.is_null(f.type) else f
+                                 for f in schema]).remove_metadata()
+    return schema, buffered
+
+def _write_columnar(chunks, file, format: str, compression: str = "zstd") -> int:
+    """Write each chunk as one Parquet row group or Arrow record batch, cast to a schema settled by lookahead."""
+    tables = (pyarrow.Table.from_pandas(chunk, preserve_index=False) for chunk in chunks)
+    schema, buffered = _columnar_schema(tables)
+    if schema is None:
+        # No chunks at all: still write a valid (column-less) file so readers can open it
+        schema = pyarrow.schema([])
+    if format == "parquet":
+        writer = pyarrow.parquet.ParquetWriter(file, schema, compression=compression)
+    else:
+        writer = pyarrow.ipc.new_file(file, schema)
+    rows = 0
+    try:
+        for table in itertools.chain(buffered, tables):
+            try:
+                table = table.cast(schema)
+            except (pyarrow.ArrowInvalid, pyarrow.ArrowTypeError, pyarrow.ArrowNotImplementedError) as e:
+                raise ValueError(f"Rows from #{rows} do not fit the export schema: {e}") from e
+            writer.write_table(table)
+            rows += len(table)
+    finally:
+        writer.close()
+    return rows
+
+def _stream_export(query: str, file_name: str, format: str, chunksize: int) -> int:
+    if format in ("parquet", "arrow"):
+        if pyarrow is None:
+            raise RuntimeError(f"pyarrow is required for '{format}' exports")
+        return _atomic_export(file_name, lambda file: _write_columnar(_read_chunks(query, chunksize=chunksize), file, format),
+                              binary=True)
+    if format not in ("csv", "json"):
+        raise ValueError("Unsupported format. Use 'csv', 'json', 'parquet' or 'arrow'.")
+    return _atomic_export(file_name, lambda file: _write_chunks(_read_chunks(query, chunksize=chunksize), file, format))
+
+def export_to_csv(table_name: str, file_name: str, chunksize: int = DEFAULT_CHUNKSIZE) -> None:
     """Export entire table to CSV"""
     try:
-        data = pd.read_sql(f"SELECT * FROM {table_name}", engine)
-        data.to_csv(file_name, index=False)
-        print(f"Exported data to CSV: {file_name}")
+        rows = _stream_export(f"SELECT * FROM {table_name}", file_name, "csv", chunksize)
+        print(f"Exported {rows} rows to CSV: {file_name}")
     except Exception as e:
         print(f"Error exporting to CSV: {e}")
 
-def export_to_json(table_name: str, file_name: str) -> None:
+def export_to_json(table_name: str, file_name: str, chunksize: int = DEFAULT_CHUNKSIZE) -> None:
     """Export entire table to JSON"""
     try:
-        data = pd.read_sql(f"SELECT * FROM {table_name}", engine)
-        data.to_json(file_name, orient="records", lines=True)
-        print(f"Exported data to JSON: {file_name}")
+        rows = _stream_export(f"SELECT * FROM {table_name}", file_name, "json", chunksize)
+        print(f"Exported {rows} rows to JSON: {file_name}")
     except Exception as e:
         print(f"Error exporting to JSON: {e}")
 
-def export_custom_query(query: str, file_name: str, format: str = "csv") -> None:
-    """Export results from a custom SQL query to CSV or JSON"""
+def export_to_parquet(table_name: str, file_name: str, chunksize: int = DEFAULT_CHUNKSIZE) -> None:
+    """Export entire table to Parquet, one zstd-compressed row group per chunk"""
     try:
-        data = pd.read_sql(query, engine)
-        if format == "csv":
-            data.to_csv(file_name, index=False)
-        elif format == "json":
-            data.to_json(file_name, orient="records", lines=True)
-        else:
-            raise ValueError("Unsupported format. Use 'csv' or 'json'.")
-        print(f"Exported query results to {file_name}")
+        rows = _stream_export(f"SELECT * FROM {table_name}", file_name, "parquet", chunksize)
+        print(f"Exported {rows} rows to Parquet: {file_name}")
+    except Exception as e:
+        print(f"Error exporting to Parquet: {e}")
+
+def export_to_arrow(table_name: str, file_name: str, chunksize: int = DEFAULT_CHUNKSIZE) -> None:
+    """Export entire table to an Arrow IPC file, one record batch per chunk"""
+    try:
+        rows = _stream_export(f"SELECT * FROM {table_name}", file_name, "arrow", chunksize)
+        print(f"Exported {rows} rows to Arrow: {file_name}")
+    except Exception as e:
+        print(f"Error exporting to Arrow: {e}")
+
+def export_custom_query(query: str, file_name: str, format: str = "csv", chunksize: int = DEFAULT_CHUNKSIZE) -> None:
+    """Export results from a custom SQL query to CSV, JSON, Parquet or Arrow"""
+    try:
+        rows = _stream_export(query, file_name, format, chunksize)
+        print(f"Exported {rows} query results to {file_name}")
     except Exception as e:
         print(f"Error exporting custom query: {e}")
 
+# === Parallel partitioned export ===
+
+def _init_export_worker():
+    # Forked workers must not reuse the parent's pooled connections
+    db_engine.dispose_all(close=False)
+
+def _export_partition(uri: str, query: str, params: dict, part_path: str, format: str, chunksize: int) -> int:
+    with open(part_path, "w", newline="", encoding="utf-8") as file:
+        return _write_chunks(_read_chunks(query, params, chunksize, uri), file, format, header=False)
+
+def _integer_key(table_name: str) -> str | None:
+    """The table's single-column primary key, if it has one."""
+    columns = inspect(engine).get_pk_constraint(table_name).get("constrained_columns") or []
+    return columns[0] if len(columns) == 1 else None
+
+def export_table_parallel(table_name: str, file_name: str, format: str = "csv", key_column: str | None = None,
+                          partitions: int | None = None, chunksize: int = DEFAULT_CHUNKSIZE) -> dict:
+    """
+    Export a large table by splitting it into `partitions` ranges of an
+    integer key column (the primary key by default), streaming each range
+    to a part file in a separate process and concatenating the parts in key
+    order into `file_name`; rows whose key is NULL go in a final part of
+    their own. Falls back to a single streaming export when
+    the table has no usable key or fits in one chunk. Returns export stats.
+    """
+    if format not in ("csv", "json"):
+        raise ValueError("Unsupported format. Use 'csv' or 'json'.")
+    partitions = partitions or os.cpu_count() or 1
+    start = time.perf_counter()
+
+    key_column = key_column or _integer_key(table_name)
+    low = high = None
+    if key_column:
+        with engine.connect() as connection:
+            low, high = connection.execute(text(f"SELECT MIN({key_column}), MAX({key_column}) FROM {table_name}")).one()
+
+    if not isinstance(low, int) or not isinstance(high, int) or partitions == 1 or high - low < chunksize:
+        rows = _stream_export(f"SELECT * FROM {table_name}", file_name, format, chunksize)
+        partitions = 1
+    else:
+        step = (high - low) // partitions + 1
+        bounds = [(low + i * step, min(low + (i + 1) * step, high + 1)) for i in range(partitions)]
+        query = f"SELECT * FROM {table_name} WHERE {key_column} >= :low AND {key_column} < :high ORDER BY {key_column}"
+        # Range predicates never match NULL keys, so those rows get a partition of their own
+        queries = [query] * len(bounds) + [f"SELECT * FROM {table_name} WHERE {key_column} IS NULL"]
+        params = [{"low": lo, "high": hi} for lo, hi in bounds] + [{}]
+        with engine.connect() as connection:
+            columns = list(connection.execute(text(f"SELECT * FROM {table_name} WHERE 1 = 0")).keys())
+
+        with tempfile.TemporaryDirectory(dir=os.path.dirname(os.path.abspath(file_name))) as parts_dir:
+            part_paths = [os.path.join(parts_dir, f"part_{i:05d}") for i in range(len(queries))]
+            with concurrent.futures.ProcessPoolExecutor(max_workers=partitions, initializer=_init_export_worker) as pool:
+                counts = list(pool.map(
+                    _export_partition,
+                    [DATABASE_URI] * len(queries), queries, params,
+                    part_paths, [format] * len(queries), [chunksize] * len(queries),
+                ))
+
+            def stitch(file) -> int:
+                if format == "csv":
+                    pd.DataFrame(columns=columns).to_csv(file, index=False)
+                for part_path in part_paths:
+                    with open(part_path, "r", newline="", encoding="utf-8") as part:
+                        shutil.copyfileobj(part, file, 1 << 20)
+                return sum(counts)
+
+            rows = _atomic_export(file_name, stitch)
+
+    elapsed = time.perf_counter() - start
+    stats = {
+        "rows": rows,
+        "partitions": partitions,
+        "seconds": elapsed,
+        "rows_per_sec": rows / elapsed if elapsed else 0.0,
+    }
+    print(f"Exported {rows} rows from '{table_name}' to {file_name} in {partitions} partition(s) "
+          f"({stats['rows_per_sec']:,.0f} rows/s)")
+    return stats
+
 # Example usage
 if __name__ == "__main__":
     export_to_csv("user_data", "user_data_export.csv")
@@ -49,4 +246,5 @@ if __name__ == "__main__":
         "active_users.csv",
         format="csv"
     )
-
+    export_to_parquet("user_data", "user_data_export.parquet")
+    export_table_parallel("user_data", "user_data_export_parallel.csv")
@@ -1,9 +1,14 @@
 import os
 import json
+import time
+import concurrent.futures
 import pandas as pd
 from cryptography.fernet import Fernet, InvalidToken
-from sqlalchemy import create_engine, text
+from sqlalchemy import text
+from sqlalchemy.exc import DataError, IntegrityError
 from datetime import datetime
+from db_engine import get_engine
+from column_encryption import ColumnEncryptor, derive_blind_index_key
 
 # Load configurations securely
 DATABASE_URI = os.environ.get('DATABASE_URI', 'sqlite:///birkini.db')
@@ -17,8 +22,11 @@ try:
 except Exception as e:
     raise ValueError("Invalid ENCRYPTION_KEY format for Fernet. Must be a 32-byte base64-encoded key.") from e
 
+# Keyed HMAC for blind-index columns; derived from ENCRYPTION_KEY unless set separately
+BLIND_INDEX_KEY = os.environ.get('BLIND_INDEX_KEY', '').encode() or derive_blind_index_key(ENCRYPTION_KEY)
+
 # Set up database connection
-engine = create_engine(DATABASE_URI)
+engine = get_engine(DATABASE_URI)
 
 def encrypt_data(value: str) -> str:
     """Encrypt a string using Fernet"""
@@ -55,6 +63,124 @@ def insert_data(data_file_path: str, table_name: str):
     except Exception as main_error:
         print(f"❌ An error occurred: {main_error}")
 
+# === Bulk ingest ===
+
+_worker_cipher = None
+
+def _init_encrypt_worker(key: str):
+    global _worker_cipher
+    _worker_cipher = Fernet(key)
+
+def _encrypt_rows(columns: list[str], rows: list[list[str]]) -> list[tuple[str | None, str | None]]:
+    """Encrypt each row into the JSON payload stored by insert_data. Returns (payload, error) per row."""
+    row_cipher = _worker_cipher or cipher
+    results = []
+    for row in rows:
+        try:
+            encrypted_row = {col: row_cipher.encrypt(val.encode()).decode() for col, val in zip(columns, row)}
+            results.append((json.dumps(encrypted_row), None))
+        except Exception as e:
+            results.append((None, str(e)))
+    return results
+
+def _read_chunks(data_file_path: str, chunksize: int):
+    if data_file_path.endswith('.csv'):
+        yield from pd.read_csv(data_file_path, chunksize=chunksize)
+    elif data_file_path.endswith(('.jsonl', '.ndjson')):
+        yield from pd.read_json(data_file_path, lines=True, chunksize=chunksize)
+    elif data_file_path.endswith('.json'):
+        data = pd.read_json(data_file_path)
+        for start in range(0, len(data), chunksize):
+            yield data.iloc[start:start + chunksize]
+    else:
+        raise ValueError("Unsupported file format. Use .csv, .json or .jsonl")
+
+def _insert_batch(statement, params: list[dict]) -> list[tuple[dict, str]]:
+    """
+    executemany the batch in one transaction. If a row is rejected
+    (integrity or data error), roll back and bisect so only the offending
+    rows are rejected; returns (params, error) for those rows. Any other
+    error (missing table, lock timeout, lost connection) fails every row
+    alike and is raised.
+    """
+    if not params:
+        return []
+    try:
+        with engine.begin() as connection:
+            connection.execute(statement, params)
+        return []
+    except (IntegrityError, DataError) as e:
+        if len(params) == 1:
+            return [(params[0], str(e.orig))]
+        middle = len(params) // 2
+        return _insert_batch(statement, params[:middle]) + _insert_batch(statement, params[middle:])
+
+def bulk_insert_data(data_file_path: str, table_name: str, chunksize: int = 50000,
+                     workers: int | None = None, encrypt_batch_size: int = 5000) -> dict:
+    """
+    Chunked, parallel variant of insert_data: reads the file in chunks,
+    encrypts rows across a process pool and inserts each chunk with one
+    prepared multi-row statement. Rows rejected by the database are
+    reported individually without falling back to row-at-a-time inserts;
+    errors that are not about a row abort the ingest, leaving earlier
+    chunks committed. Returns ingest stats.
+    """
+    statement = text(f"INSERT INTO {table_name} (data, timestamp) VALUES (:data, :timestamp)")
+    stats = {"rows": 0, "inserted": 0, "failed": 0}
+    start = time.perf_counter()
+
+    with concurrent.futures.ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_encrypt_worker, initargs=(ENCRYPTION_KEY,)) as pool:
+        for chunk in _read_chunks(data_file_path, chunksize):
+            columns = [str(col) for col in chunk.columns]
+            rows = chunk.astype(str).apply(lambda column: column.str.strip()).values.tolist()
+            timestamp = datetime.utcnow().isoformat()
+
+            batches = [rows[i:i + encrypt_batch_size] for i in range(0, len(rows), encrypt_batch_size)]
+            params = []
+            for batch, encrypted in zip(batches, pool.map(_encrypt_rows, [columns] * len(batches), batches)):
+                for row, (payload, error) in zip(batch, encrypted):
+                    if error is None:
+                        params.append({"data": payload, "timestamp": timestamp})
+                    else:
+                        stats["failed"] += 1
+                        print(f"Failed to encrypt row: {dict(zip(columns, row))} — Error: {error}")
+
+            rejected = _insert_batch(statement, params)
+            for _, error in rejected:
+                print(f"Failed to insert row into '{table_name}' — Error: {error}")
+
+            stats["rows"] += len(rows)
+            stats["inserted"] += len(params) - len(rejected)
+            stats["failed"] += len(rejected)
+
+    stats["seconds"] = time.perf_counter() - start
+    stats["rows_per_sec"] = stats["rows"] / stats["seconds"] if stats["seconds"] else 0.0
+    print(f"✅ Bulk inserted {stats['inserted']}/{stats['rows']} rows into '{table_name}' "
+          f"({stats['rows_per_sec']:,.0f} rows/s, {stats['failed']} failed)")
+    return stats
+
+# === Column-level encryption ===
+
+def insert_data_columns(data_file_path: str, table_name: str, encrypted_columns: list[str],
+                        indexed_columns: list[str] = (), chunksize: int = 50000) -> int:
+    """
+    Insert a file into a table with one SQL column per field instead of a
+    single encrypted JSON blob. Only `encrypted_columns` are encrypted, and
+    `indexed_columns` also get an indexed HMAC blind-index column so
+    query_api.lookup_encrypted can find rows by equality without a scan.
+    """
+    encryptor = ColumnEncryptor(engine, cipher, BLIND_INDEX_KEY, table_name, encrypted_columns, indexed_columns)
+    inserted = 0
+    for chunk in _read_chunks(data_file_path, chunksize):
+        if not inserted:
+            encryptor.create_table([str(col) for col in chunk.columns])
+        records = chunk.astype(str).apply(lambda column: column.str.strip()).to_dict(orient='records')
+        inserted += encryptor.insert_rows(records)
+    print(f"✅ Inserted {inserted} rows into '{table_name}' "
+          f"({len(encryptor.encrypted_columns)} encrypted, {len(encryptor.indexed_columns)} blind-indexed columns)")
+    return inserted
+
 # Example usage
 if __name__ == '__main__':
     data_file = './data/example_data.csv'
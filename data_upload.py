@@ -3,10 +3,10 @@ import logging
 from datetime import datetime
 
 import pandas as pd
-from sqlalchemy import create_engine
 from sqlalchemy.exc import SQLAlchemyError
 
 from config import Config
+from db_engine import get_engine
 
 # === Logging Configuration ===
 logger = logging.getLogger("BirkiniDataPipeline")
@@ -18,9 +18,9 @@ logger.addHandler(console_handler)
 
 # === Database Engine Initialization ===
 def get_db_engine():
-    """Create and return a SQLAlchemy engine."""
+    """Return the shared, pooled SQLAlchemy engine for Config.DATABASE_URI."""
     try:
-        return create_engine(Config.DATABASE_URI)
+        return get_engine(Config.DATABASE_URI)
     except Exception as e:
         logger.error(f"Failed to create database engine: {e}")
         raise
@@ -2,12 +2,13 @@ import os
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
-from sqlalchemy import create_engine
 from sqlalchemy.exc import SQLAlchemyError
 
+from db_engine import get_engine
+
 # Database connection setup
 DATABASE_URI = os.environ.get("DATABASE_URI", "sqlite:///birkini.db")
-engine = create_engine(DATABASE_URI)
+engine = get_engine(DATABASE_URI)
 
 def fetch_data(query: str) -> pd.DataFrame | None:
     """Execute SQL query and return the result as a DataFrame."""
@@ -0,0 +1,121 @@
+import os
+import logging
+import threading
+from typing import Any, Dict
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.pool import QueuePool, StaticPool
+
+logger = logging.getLogger("BirkiniDBEngine")
+
+# Default database used by every data module when DATABASE_URI is not set
+DEFAULT_DATABASE_URI = "sqlite:///birkini.db"
+
+# Pool settings; each can be overridden per engine through get_engine(**overrides)
+POOL_SETTINGS: Dict[str, Any] = {
+    "pool_size": int(os.environ.get("DB_POOL_SIZE", 5)),
+    "max_overflow": int(os.environ.get("DB_MAX_OVERFLOW", 10)),
+    "pool_recycle": int(os.environ.get("DB_POOL_RECYCLE", 1800)),
+    "pool_timeout": int(os.environ.get("DB_POOL_TIMEOUT", 30)),
+    "pool_pre_ping": os.environ.get("DB_POOL_PRE_PING", "1") == "1",
+}
+
+# Applied to every new SQLite connection
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "busy_timeout": int(os.environ.get("SQLITE_BUSY_TIMEOUT_MS", 5000)),
+}
+
+_engines: Dict[str, Engine] = {}
+_counters: Dict[str, Dict[str, int]] = {}
+_lock = threading.Lock()
+
+def database_uri() -> str:
+    return os.environ.get("DATABASE_URI", DEFAULT_DATABASE_URI)
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    try:
+        for pragma, value in SQLITE_PRAGMAS.items():
+            cursor.execute(f"PRAGMA {pragma}={value}")
+    finally:
+        cursor.close()
+
+def _disable_pysqlite_transactions(dbapi_connection, connection_record):
+    dbapi_connection.isolation_level = None
+
+def _begin_sqlite_transaction(connection):
+    connection.exec_driver_sql("BEGIN")
+
+def _build_engine(uri: str, overrides: Dict[str, Any]) -> Engine:
+    url = make_url(uri)
+    settings = {**POOL_SETTINGS, **overrides}
+    if url.get_backend_name() == "sqlite":
+        if url.database in (None, "", ":memory:"):
+            # One shared in-memory database; a pool of separate connections would each see an empty DB
+            engine = create_engine(uri, poolclass=StaticPool, connect_args={"check_same_thread": False})
+        else:
+            engine = create_engine(uri, poolclass=QueuePool, connect_args={"check_same_thread": False}, **settings)
+            event.listen(engine, "connect", _apply_sqlite_pragmas)
+        # pysqlite only opens transactions before DML and silently autocommits DDL; emit BEGIN
+        # ourselves so CREATE/DROP/ALTER roll back with the rest of the transaction
+        event.listen(engine, "connect", _disable_pysqlite_transactions)
+        event.listen(engine, "begin", _begin_sqlite_transaction)
+    else:
+        engine = create_engine(uri, **settings)
+
+    counters = _counters[uri] = {"connects": 0, "checkouts": 0}
+    event.listen(engine, "connect", lambda *_: counters.__setitem__("connects", counters["connects"] + 1))
+    event.listen(engine, "checkout", lambda *_: counters.__setitem__("checkouts", counters["checkouts"] + 1))
+    return engine
+
+def get_engine(uri: str | None = None, **overrides: Any) -> Engine:
+    """
+    Shared, pooled engine for a database URI (DATABASE_URI by default).
+    Engines are created once per URI and reused by every module, so callers
+    borrow pooled connections instead of reconnecting per request. Overrides
+    only apply to the call that first creates the engine.
+    """
+    uri = uri or database_uri()
+    engine = _engines.get(uri)
+    if engine is not None:
+        return engine
+    with _lock:
+        engine = _engines.get(uri)
+        if engine is None:
+            engine = _engines[uri] = _build_engine(uri, overrides)
+            logger.info(f"Created pooled engine for {make_url(uri).render_as_string(hide_password=True)}")
+    return engine
+
+def pool_stats(uri: str | None = None) -> Dict[str, Any]:
+    """Pool occupancy plus lifetime connect/checkout counts for a registered engine."""
+    uri = uri or database_uri()
+    engine = _engines.get(uri)
+    if engine is None:
+        return {"uri": make_url(uri).render_as_string(hide_password=True), "registered": False}
+    pool = engine.pool
+    stats: Dict[str, Any] = {
+        "uri": make_url(uri).render_as_string(hide_password=True),
+        "registered": True,
+        "pool": type(pool).__name__,
+        "status": pool.status(),
+        **_counters[uri],
+    }
+    if isinstance(pool, QueuePool):
+        stats.update(size=pool.size(), checked_in=pool.checkedin(),
+                     checked_out=pool.checkedout(), overflow=pool.overflow())
+    return stats
+
+def dispose_all(close: bool = True):
+    """
+    Drop every pooled connection, e.g. on shutdown. In a forked worker pass
+    close=False so connections inherited from the parent are abandoned, not
+    closed underneath it; the worker then builds its own pools on demand.
+    """
+    with _lock:
+        for engine in _engines.values():
+            engine.dispose(close=close)
+        _engines.clear()
+        _counters.clear()
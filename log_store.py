@@ -0,0 +1,268 @@
+import os
+import time
+import pickle
+import sqlite3
+import struct
+import logging
+import threading
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# === Spill Tiers ===
+
+class SQLiteSpillStore:
+    """
+    Disk tier backed by a single SQLite table. Values are pickled, so any
+    gateway log entry (MCPMessage, proof tuples) can be spilled.
+    """
+
+    def __init__(self, path: str = "gateway_spill.db", table: str = "log_spill"):
+        self.path = path
+        self.table = table
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} (key TEXT PRIMARY KEY, value BLOB NOT NULL, stored_at REAL NOT NULL)"
+        )
+        self.conn.commit()
+
+    def put(self, key: str, value: Any):
+        with self.lock:
+            self.conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, stored_at) VALUES (?, ?, ?)",
+                (key, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), time.time())
+            )
+            self.conn.commit()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self.lock:
+            row = self.conn.execute(f"SELECT value FROM {self.table} WHERE key = ?", (key,)).fetchone()
+        return pickle.loads(row[0]) if row else None
+
+    def delete(self, key: str):
+        with self.lock:
+            self.conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+            self.conn.commit()
+
+    def __contains__(self, key: str) -> bool:
+        with self.lock:
+            return self.conn.execute(f"SELECT 1 FROM {self.table} WHERE key = ?", (key,)).fetchone() is not None
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+class SegmentFileSpillStore:
+    """
+    Disk tier backed by append-only segment files. Each record is a
+    length-prefixed key/value pair; only (offset, length) per key is kept in
+    memory, per segment. A new segment is started every `segment_seconds`,
+    and segments older than `retention_seconds` (or beyond `max_segments`)
+    are dropped whole, file and index together, so both disk use and the
+    resident index stay bounded on long-running gateways. Deletes only drop
+    the index entry; the bytes go when their segment expires.
+    """
+
+    HEADER = struct.Struct(">II")
+
+    def __init__(self, path: str = "gateway_spill.seg", segment_seconds: float = 300.0,
+                 retention_seconds: Optional[float] = 3600.0, max_segments: Optional[int] = None):
+        if segment_seconds <= 0:
+            raise ValueError("segment_seconds must be positive")
+        if retention_seconds is not None and retention_seconds <= 0:
+            raise ValueError("retention_seconds must be positive")
+        if max_segments is not None and max_segments < 1:
+            raise ValueError("max_segments must be at least 1")
+        self.path = path
+        self.segment_seconds = segment_seconds
+        self.retention_seconds = retention_seconds
+        self.max_segments = max_segments
+        self.lock = threading.Lock()
+        # Oldest first: (sequence, started_at, file, index)
+        self.segments: List[Tuple[int, float, Any, Dict[str, Tuple[int, int]]]] = []
+        self._load_segments()
+
+    def _segment_path(self, sequence: int) -> str:
+        return f"{self.path}.{sequence:06d}"
+
+    def _load_segments(self):
+        directory, prefix = os.path.split(os.path.abspath(self.path))
+        sequences = sorted(
+            int(name[len(prefix) + 1:]) for name in os.listdir(directory)
+            if name.startswith(prefix + ".") and name[len(prefix) + 1:].isdigit()
+        )
+        for sequence in sequences:
+            path = self._segment_path(sequence)
+            file = open(path, "a+b")
+            self.segments.append((sequence, os.path.getmtime(path), file, self._read_index(file)))
+        self._expire(time.time())
+
+    def _read_index(self, file) -> Dict[str, Tuple[int, int]]:
+        index: Dict[str, Tuple[int, int]] = {}
+        file.seek(0)
+        offset = 0
+        while True:
+            header = file.read(self.HEADER.size)
+            if len(header) < self.HEADER.size:
+                break
+            key_len, value_len = self.HEADER.unpack(header)
+            key = file.read(key_len).decode()
+            file.seek(value_len, os.SEEK_CUR)
+            index[key] = (offset + self.HEADER.size + key_len, value_len)
+            offset += self.HEADER.size + key_len + value_len
+        return index
+
+    def _expire(self, now: float):
+        while self.segments:
+            sequence, started_at, file, _ = self.segments[0]
+            # A segment's newest record is at most segment_seconds younger than its start
+            too_old = (self.retention_seconds is not None
+                       and now - started_at > self.retention_seconds + self.segment_seconds)
+            too_many = self.max_segments is not None and len(self.segments) > self.max_segments
+            if not (too_old or too_many):
+                break
+            self.segments.pop(0)
+            file.close()
+            os.remove(self._segment_path(sequence))
+
+    def _active_segment(self, now: float):
+        if not self.segments or now - self.segments[-1][1] >= self.segment_seconds:
+            sequence = self.segments[-1][0] + 1 if self.segments else 0
+            self.segments.append((sequence, now, open(self._segment_path(sequence), "a+b"), {}))
+            self._expire(now)
+        return self.segments[-1]
+
+    def put(self, key: str, value: Any):
+        key_bytes = key.encode()
+        value_bytes = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        with self.lock:
+            _, _, file, index = self._active_segment(time.time())
+            file.seek(0, os.SEEK_END)
+            offset = file.tell()
+            file.write(self.HEADER.pack(len(key_bytes), len(value_bytes)) + key_bytes + value_bytes)
+            file.flush()
+            index[key] = (offset + self.HEADER.size + len(key_bytes), len(value_bytes))
+
+    def get(self, key: str) -> Optional[Any]:
+        with self.lock:
+            for _, _, file, index in reversed(self.segments):
+                location = index.get(key)
+                if location is not None:
+                    file.seek(location[0])
+                    data = file.read(location[1])
+                    break
+            else:
+                return None
+        return pickle.loads(data)
+
+    def delete(self, key: str):
+        with self.lock:
+            for _, _, _, index in self.segments:
+                index.pop(key, None)
+
+    def __contains__(self, key: str) -> bool:
+        with self.lock:
+            return any(key in index for _, _, _, index in self.segments)
+
+    def __len__(self) -> int:
+        with self.lock:
+            return sum(len(index) for _, _, _, index in self.segments)
+
+    def close(self):
+        with self.lock:
+            for _, _, file, _ in self.segments:
+                file.close()
+
+# === Bounded In-Memory Store ===
+
+class BoundedLogStore(MutableMapping):
+    """
+    Insertion-ordered log store with size and/or TTL based eviction.
+
+    Evicted entries are handed to the optional spill tier (SQLiteSpillStore or
+    SegmentFileSpillStore) and stay readable through __getitem__/__contains__.
+    len() and iteration only cover entries still resident in memory.
+    """
+
+    def __init__(self, max_entries: Optional[int] = 100000, ttl: Optional[float] = None, spill=None):
+        if max_entries is not None and max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        if ttl is not None and ttl <= 0:
+            raise ValueError("ttl must be positive")
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.spill = spill
+        self.evicted = 0
+        self.lock = threading.RLock()
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+
+    def _evict(self, now: float):
+        while self._entries:
+            key, (stored_at, value) = next(iter(self._entries.items()))
+            over_size = self.max_entries is not None and len(self._entries) > self.max_entries
+            expired = self.ttl is not None and now - stored_at > self.ttl
+            if not (over_size or expired):
+                break
+            del self._entries[key]
+            self.evicted += 1
+            if self.spill is not None:
+                self.spill.put(key, value)
+
+    def __setitem__(self, key: str, value: Any):
+        now = time.monotonic()
+        with self.lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (now, value)
+            self._evict(now)
+
+    def __getitem__(self, key: str) -> Any:
+        with self.lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if self.ttl is None or time.monotonic() - entry[0] <= self.ttl:
+                    return entry[1]
+                self._evict(time.monotonic())
+        if self.spill is not None:
+            value = self.spill.get(key)
+            if value is not None:
+                return value
+        raise KeyError(key)
+
+    def __delitem__(self, key: str):
+        with self.lock:
+            found = self._entries.pop(key, None) is not None
+        if self.spill is not None and key in self.spill:
+            self.spill.delete(key)
+            found = True
+        if not found:
+            raise KeyError(key)
+
+    def __contains__(self, key: object) -> bool:
+        # Membership never unpickles: resident entries are checked in memory, spilled ones by key only
+        with self.lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if self.ttl is None or time.monotonic() - entry[0] <= self.ttl:
+                    return True
+                self._evict(time.monotonic())
+        return self.spill is not None and key in self.spill
+
+    def __iter__(self) -> Iterator[str]:
+        with self.lock:
+            return iter(list(self._entries))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"resident": len(self._entries), "evicted": self.evicted, "spill": type(self.spill).__name__ if self.spill else None}
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    store = BoundedLogStore(max_entries=1000, spill=SQLiteSpillStore(":memory:"))
+    for i in range(10000):
+        store[f"msg_{i}"] = ("statement", f"proof_{i}")
+    logging.info(f"Store stats: {store.stats()} | msg_0 still retrievable: {store['msg_0']}")
@@ -0,0 +1,170 @@
+import json
+import time
+import pickle
+import sqlite3
+import hashlib
+import logging
+import threading
+import concurrent.futures
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger("BirkiniProofCache")
+
+def dataset_fingerprint(dataset: Any) -> str:
+    """Canonical content hash of a dataset: sorted-key JSON, hashed with SHA-256."""
+    canonical = json.dumps(dataset, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+def dataset_version(dataset: Any) -> Tuple[Optional[str], Optional[str]]:
+    """(dataset id, metadata version) when the dataset carries them, else (None, None)."""
+    metadata = dataset.get("metadata", {}) if isinstance(dataset, dict) else {}
+    dataset_id = metadata.get("id")
+    version = metadata.get("version")
+    return (str(dataset_id) if dataset_id is not None else None,
+            str(version) if version is not None else None)
+
+class ProofCache:
+    """
+    Content-addressed cache for ZK proofs with an in-memory LRU tier and an
+    optional persistent SQLite tier at `db_path` (memory only when None).
+    When a dataset id shows up with a new metadata version, every cached
+    proof for its older versions is dropped from both tiers. Concurrent
+    get_or_create calls for the same dataset generate its proof once.
+    """
+
+    def __init__(self, max_memory_entries: int = 256, db_path: Optional[str] = None):
+        self.max_memory_entries = max_memory_entries
+        self.lock = threading.Lock()
+        self.memory: "OrderedDict[str, Any]" = OrderedDict()
+        self.versions: Dict[str, str] = {}
+        # Fingerprint -> proof being generated, so concurrent misses wait for it instead of generating again
+        self.pending: Dict[str, concurrent.futures.Future] = {}
+        self.hits_memory = 0
+        self.hits_disk = 0
+        self.hits_pending = 0
+        self.misses = 0
+        self.invalidations = 0
+
+        self.conn = None
+        if db_path:
+            self.conn = sqlite3.connect(db_path, check_same_thread=False)
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS proof_cache ("
+                "fingerprint TEXT PRIMARY KEY, dataset_id TEXT, version TEXT, proof BLOB NOT NULL, created_at REAL NOT NULL)"
+            )
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_proof_cache_dataset ON proof_cache (dataset_id)")
+            self.conn.commit()
+
+    def _invalidate_stale(self, dataset_id: Optional[str], version: Optional[str]):
+        if dataset_id is None or version is None:
+            return
+        # The first sighting of an id after start-up still sweeps the disk tier for other versions.
+        if self.versions.get(dataset_id) == version:
+            return
+        self.versions[dataset_id] = version
+
+        stale = [key for key, (entry_id, entry_version, _) in self.memory.items()
+                 if entry_id == dataset_id and entry_version != version]
+        for key in stale:
+            del self.memory[key]
+        removed = len(stale)
+        if self.conn is not None:
+            cursor = self.conn.execute(
+                "DELETE FROM proof_cache WHERE dataset_id = ? AND version != ?", (dataset_id, version))
+            self.conn.commit()
+            removed = max(removed, cursor.rowcount)
+        if not removed:
+            return
+        self.invalidations += removed
+        logger.info(f"Dataset {dataset_id} moved to version {version}; invalidated {removed} cached proofs")
+
+    def get(self, dataset: Any, fingerprint: Optional[str] = None) -> Tuple[bool, Any]:
+        """Return (hit, proof) for a dataset."""
+        fingerprint = fingerprint or dataset_fingerprint(dataset)
+        dataset_id, version = dataset_version(dataset)
+        with self.lock:
+            self._invalidate_stale(dataset_id, version)
+            entry = self.memory.get(fingerprint)
+            if entry is not None:
+                self.memory.move_to_end(fingerprint)
+                self.hits_memory += 1
+                return True, entry[2]
+
+            if self.conn is not None:
+                row = self.conn.execute(
+                    "SELECT proof FROM proof_cache WHERE fingerprint = ?", (fingerprint,)).fetchone()
+                if row is not None:
+                    proof = pickle.loads(row[0])
+                    self._remember(fingerprint, dataset_id, version, proof)
+                    self.hits_disk += 1
+                    return True, proof
+
+            self.misses += 1
+            return False, None
+
+    def put(self, dataset: Any, proof: Any, fingerprint: Optional[str] = None):
+        fingerprint = fingerprint or dataset_fingerprint(dataset)
+        dataset_id, version = dataset_version(dataset)
+        with self.lock:
+            self._invalidate_stale(dataset_id, version)
+            self._remember(fingerprint, dataset_id, version, proof)
+            if self.conn is not None:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO proof_cache (fingerprint, dataset_id, version, proof, created_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (fingerprint, dataset_id, version, pickle.dumps(proof, protocol=pickle.HIGHEST_PROTOCOL), time.time())
+                )
+                self.conn.commit()
+
+    def _remember(self, fingerprint: str, dataset_id: Optional[str], version: Optional[str], proof: Any):
+        self.memory[fingerprint] = (dataset_id, version, proof)
+        self.memory.move_to_end(fingerprint)
+        while len(self.memory) > self.max_memory_entries:
+            self.memory.popitem(last=False)
+
+    def get_or_create(self, dataset: Any, generate) -> Any:
+        """
+        Return the cached proof for `dataset`, calling generate(dataset) and
+        caching it on a miss. Callers arriving while the same dataset is being
+        generated wait for that proof (or its exception).
+        """
+        fingerprint = dataset_fingerprint(dataset)
+        with self.lock:
+            future = self.pending.get(fingerprint)
+            owner = future is None
+            if owner:
+                future = self.pending[fingerprint] = concurrent.futures.Future()
+            else:
+                self.hits_pending += 1
+        if not owner:
+            return future.result()
+
+        try:
+            hit, proof = self.get(dataset, fingerprint)
+            if not hit:
+                proof = generate(dataset)
+                self.put(dataset, proof, fingerprint)
+            future.set_result(proof)
+            return proof
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self.lock:
+                del self.pending[fingerprint]
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits_memory": self.hits_memory,
+            "hits_disk": self.hits_disk,
+            "hits_pending": self.hits_pending,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "memory_entries": len(self.memory),
+        }
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
@@ -1,8 +1,13 @@
 import os
 import json
-from sqlalchemy import create_engine, text
+import concurrent.futures
+from collections import deque
+from typing import Iterator, Sequence
+from sqlalchemy import text
 from sqlalchemy.exc import SQLAlchemyError
 from cryptography.fernet import Fernet
+from db_engine import get_engine
+from column_encryption import ColumnEncryptor, derive_blind_index_key
 
 # Load environment configurations
 DATABASE_URI = os.environ.get("DATABASE_URI", "sqlite:///birkini.db")
@@ -14,8 +19,11 @@ if not ENCRYPTION_KEY:
 # Set up Fernet encryption
 cipher = Fernet(ENCRYPTION_KEY)
 
+# Keyed HMAC for blind-index lookups; must match the key data_insertion wrote with
+BLIND_INDEX_KEY = os.environ.get("BLIND_INDEX_KEY", "").encode() or derive_blind_index_key(ENCRYPTION_KEY)
+
 # Initialize SQLAlchemy engine
-engine = create_engine(DATABASE_URI)
+engine = get_engine(DATABASE_URI)
 
 def decrypt_data(value: str) -> str:
     """Decrypt a single encrypted string value."""
@@ -48,9 +56,73 @@ def query_data(query: str, parameters: dict | None = None) -> list[dict]:
     
     return []
 
+def _decrypt_token(value) -> str:
+    if isinstance(value, bytes):
+        value = value.decode()
+    return cipher.decrypt(value.encode()).decode()
+
+def _decrypt_batch(rows: list[dict], encrypted_columns: Sequence[str],
+                   encrypted_payload_columns: Sequence[str]) -> list[dict]:
+    """Decrypt only the declared columns of a batch. Invalid tokens raise instead of passing through."""
+    decrypted_rows = []
+    for row in rows:
+        decrypted_row = dict(row)
+        for column in encrypted_columns:
+            if decrypted_row.get(column) is not None:
+                decrypted_row[column] = _decrypt_token(decrypted_row[column])
+        for column in encrypted_payload_columns:
+            # data_insertion stores rows as a JSON object of per-cell Fernet tokens
+            if decrypted_row.get(column) is not None:
+                payload = json.loads(decrypted_row[column])
+                decrypted_row[column] = {key: _decrypt_token(token) for key, token in payload.items()}
+        decrypted_rows.append(decrypted_row)
+    return decrypted_rows
+
+def stream_query(query: str, parameters: dict | None = None, encrypted_columns: Sequence[str] = (),
+                 encrypted_payload_columns: Sequence[str] = (), batch_size: int = 1000,
+                 workers: int = 4) -> Iterator[list[dict]]:
+    """
+    Execute a SQL query with a server-side cursor and yield decrypted rows in
+    batches of up to `batch_size`. Only `encrypted_columns` (single Fernet
+    tokens) and `encrypted_payload_columns` (data_insertion JSON payloads)
+    are decrypted, on a pool of `workers` threads while the next batch is
+    fetched. At most `workers` batches are held in memory at once.
+    """
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as pool:
+        pending: deque = deque()
+        with engine.connect() as connection:
+            result = connection.execution_options(stream_results=True, yield_per=batch_size).execute(
+                text(query), parameters or {})
+            for partition in result.mappings().partitions(batch_size):
+                rows = [dict(row) for row in partition]
+                pending.append(pool.submit(_decrypt_batch, rows, encrypted_columns, encrypted_payload_columns))
+                if len(pending) >= workers:
+                    yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+_encryptors: dict[str, ColumnEncryptor] = {}
+
+def lookup_encrypted(table_name: str, column: str, value) -> list[dict]:
+    """
+    Equality lookup on an encrypted column through its blind index: one
+    indexed seek, then only the matching rows are decrypted. Column settings
+    come from the encryption metadata recorded at insert time.
+    """
+    encryptor = _encryptors.get(table_name)
+    if encryptor is None or column not in encryptor.indexed_columns:
+        encryptor = ColumnEncryptor.from_metadata(engine, cipher, BLIND_INDEX_KEY, table_name)
+        _encryptors[table_name] = encryptor
+    return encryptor.lookup(column, value)
+
 # Example usage
 if __name__ == "__main__":
     query = "SELECT * FROM user_data WHERE user_id = :user_id"
     parameters = {"user_id": 1}
     result = query_data(query, parameters)
     print("Decrypted Query Results:", result)
+
+    for batch in stream_query("SELECT * FROM user_data", encrypted_payload_columns=["data"]):
+        print(f"Streamed batch of {len(batch)} decrypted rows")
+
+    print("Blind-index lookup:", lookup_encrypted("user_data", "user_id", 1))
@@ -1,13 +1,14 @@
-import sqlite3
 import pandas as pd
 
+from db_engine import get_engine
+
 # Database connection
 DATABASE = "birkini.db"
+DATABASE_URI = f"sqlite:///{DATABASE}"
 
 def connect_db():
-    """Connect to the Birkini database."""
-    conn = sqlite3.connect(DATABASE)
-    return conn
+    """Borrow a pooled connection to the Birkini database; close() returns it to the pool."""
+    return get_engine(DATABASE_URI).connect()
 
 def execute_query(query, params=None):
     """Execute an SQL query and return results as a pandas DataFrame."""
@@ -0,0 +1,210 @@
+import os
+import io
+import gzip
+import json
+import time
+import uuid
+import logging
+import tempfile
+import itertools
+from collections.abc import Sequence
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Iterator, List
+
+try:
+    import zstandard
+except ImportError:  # optional: only needed for "ndjson.zst"
+    zstandard = None
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:  # optional: only needed for "parquet" and "arrow"
+    pyarrow = None
+
+logger = logging.getLogger("BirkiniResultExporter")
+
+EXTENSIONS = {
+    "json": ".json",
+    "ndjson": ".ndjson",
+    "ndjson.gz": ".ndjson.gz",
+    "ndjson.zst": ".ndjson.zst",
+    "parquet": ".parquet",
+    "arrow": ".arrow",
+}
+
+# Batches of streamed (non-list) records buffered to resolve columns that are all None so far
+SCHEMA_LOOKAHEAD_BATCHES = 8
+
+def result_records(result: Any) -> Iterable[Dict[str, Any]]:
+    """Rows to export: a result's "records"/"rows" list when present, an iterable of dicts, or the result itself."""
+    if isinstance(result, dict):
+        for key in ("records", "rows"):
+            if isinstance(result.get(key), list):
+                return result[key]
+        return [result]
+    return result
+
+def _batched(records: Iterable[Dict[str, Any]], size: int) -> Iterator[List[Dict[str, Any]]]:
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+class ResultExporter:
+    """
+    Streams query results to disk as NDJSON (plain, gzip or zstd), Arrow IPC
+    or Parquet. Files are written to a temporary name in the output directory
+    and atomically renamed, and every file name carries a millisecond
+    timestamp plus a random suffix so concurrent exports never collide.
+    """
+
+    def __init__(self, output_dir: str = ".", prefix: str = "birkini_output", batch_size: int = 10000,
+                 compression_level: int = 6):
+        self.output_dir = output_dir
+        self.prefix = prefix
+        self.batch_size = batch_size
+        self.compression_level = compression_level
+
+    def _target_path(self, mode: str) -> str:
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")[:-3]
+        return os.path.join(self.output_dir, f"{self.prefix}_{stamp}_{uuid.uuid4().hex[:8]}{EXTENSIONS[mode]}")
+
+    def export(self, result: Any, mode: str = "ndjson") -> Dict[str, Any]:
+        """Write `result` in the given mode and return path, record count, bytes and throughput."""
+        if mode not in EXTENSIONS:
+            raise ValueError(f"Unsupported export mode '{mode}'. Use one of: {', '.join(EXTENSIONS)}")
+        if mode == "ndjson.zst" and zstandard is None:
+            raise RuntimeError("zstandard is required for 'ndjson.zst' exports")
+        if mode in ("parquet", "arrow") and pyarrow is None:
+            raise RuntimeError(f"pyarrow is required for '{mode}' exports")
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        path = self._target_path(mode)
+        fd, tmp_path = tempfile.mkstemp(dir=self.output_dir, prefix=".tmp_", suffix=EXTENSIONS[mode])
+        start = time.perf_counter()
+        try:
+            with os.fdopen(fd, "wb") as raw:
+                if mode == "json":
+                    count = self._write_json(raw, result)
+                elif mode.startswith("ndjson"):
+                    count = self._write_ndjson(raw, result_records(result), mode)
+                else:
+                    count = self._write_columnar(raw, result_records(result), mode)
+                raw.flush()
+                os.fsync(raw.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        elapsed = time.perf_counter() - start
+        size = os.path.getsize(path)
+        stats = {
+            "path": path,
+            "mode": mode,
+            "records": count,
+            "bytes": size,
+            "seconds": elapsed,
+            "records_per_sec": count / elapsed if elapsed else 0.0,
+            "mb_per_sec": size / elapsed / 1e6 if elapsed else 0.0,
+        }
+        logger.info(
+            f"Results exported to {path}: {count} records, {size} bytes "
+            f"({stats['records_per_sec']:,.0f} records/s, {stats['mb_per_sec']:.2f} MB/s)"
+        )
+        return stats
+
+    def _write_json(self, raw: io.BufferedWriter, result: Any) -> int:
+        if not isinstance(result, dict):
+            result = list(result)
+        raw.write(json.dumps(result, separators=(",", ":"), default=str).encode())
+        return len(result) if isinstance(result, list) else 1
+
+    def _write_ndjson(self, raw: io.BufferedWriter, records: Iterable[Dict[str, Any]], mode: str) -> int:
+        if mode == "ndjson.gz":
+            stream = gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=self.compression_level)
+        elif mode == "ndjson.zst":
+            stream = zstandard.ZstdCompressor(level=self.compression_level).stream_writer(raw, closefd=False)
+        else:
+            stream = None
+
+        sink = stream or raw
+        count = 0
+        try:
+            for batch in _batched(records, self.batch_size):
+                sink.write("".join(json.dumps(record, separators=(",", ":"), default=str) + "\n"
+                                   for record in batch).encode())
+                count += len(batch)
+        finally:
+            if stream is not None:
+                stream.close()
+        return count
+
+    def _infer_schema(self, records: Iterable[Dict[str, Any]], batches: Iterator[List[Dict[str, Any]]]):
+        """
+        Unify and widen the schema over the batches needed to fix it: every
+        batch for in-memory record lists, otherwise until no column is all
+        None (at most SCHEMA_LOOKAHEAD_BATCHES). Columns still all None become
+        strings. Returns (schema, buffered batches).
+        """
+        scan_all = isinstance(records, Sequence)
+        buffered: List[List[Dict[str, Any]]] = []
+        schema = None
+        for batch in batches:
+            buffered.append(batch)
+            batch_schema = pyarrow.Table.from_pylist(batch).schema
+            try:
+                schema = batch_schema if schema is None else pyarrow.unify_schemas(
+                    [schema, batch_schema], promote_options="permissive")
+            except (pyarrow.ArrowInvalid, pyarrow.ArrowTypeError) as e:
+                raise ValueError(f"Records have incompatible column types: {e}") from e
+            has_null = any(pyarrow.types.is_null(f.type) for f in schema)
+            if not scan_all and (not has_null or len(buffered) >= SCHEMA_LOOKAHEAD_BATCHES):
+                break
+        if schema is not None:
+            schema = pyarrow.schema([f.with_type(pyarrow.string()) if pyarrow.types.is_null(f.type) else f
+                                     for f in schema])
+        return schema, buffered
+
+    def _write_columnar(self, raw: io.BufferedWriter, records: Iterable[Dict[str, Any]], mode: str) -> int:
+        batches = _batched(records, self.batch_size)
+        schema, buffered = self._infer_schema(records, batches)
+        if schema is None:
+            # No records: still write a valid (column-less) file so readers can open it
+            schema = pyarrow.schema([])
+        columns = set(schema.names)
+        if mode == "parquet":
+            writer = pyarrow.parquet.ParquetWriter(raw, schema, compression="zstd")
+        else:
+            writer = pyarrow.ipc.new_file(raw, schema)
+        count = 0
+        try:
+            for batch in itertools.chain(buffered, batches):
+                # Streamed records can still bring new keys after the schema is fixed; refuse rather than drop them
+                extra = {key for record in batch for key in record} - columns
+                if extra:
+                    raise ValueError(f"Records from #{count} add columns {sorted(extra)} missing from the export "
+                                     f"schema; pass the records as a list so the schema covers every batch")
+                try:
+                    table = pyarrow.Table.from_pylist(batch, schema=schema)
+                except (pyarrow.ArrowInvalid, pyarrow.ArrowTypeError) as e:
+                    raise ValueError(f"Records from #{count} do not fit the export schema: {e}") from e
+                writer.write_table(table)
+                count += len(batch)
+        finally:
+            writer.close()
+        return count
+
+def load_arrow(path: str, memory_map: bool = True):
+    """Open an Arrow IPC export, memory-mapped so downstream jobs skip parsing entirely."""
+    if pyarrow is None:
+        raise RuntimeError("pyarrow is required to read Arrow exports")
+    source = pyarrow.memory_map(path, "r") if memory_map else pyarrow.OSFile(path, "rb")
+    return pyarrow.ipc.open_file(source).read_all()
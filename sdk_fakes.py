@@ -0,0 +1,200 @@
+# sdk_fakes.py
+#
+# In-process stand-ins for the hypothetical `birkini.sdk` classes used by
+# PIPELINE.py and modelrtr.py. Call install() before importing those modules
+# to run them locally without the real SDK or network access. Running this
+# file directly benchmarks both against the fakes.
+
+import sys
+import json
+import time
+import types
+import hashlib
+import random
+import threading
+from typing import Dict, Any, Iterator
+
+# Simulated per-call latency in seconds, keyed by operation name.
+LATENCY: Dict[str, float] = {
+    "fetch": 0.0,
+    "prove": 0.0,
+    "connect": 0.0,
+    "register": 0.0,
+    "bind": 0.0,
+    "analyze": 0.0,
+    "execute": 0.0,
+}
+
+def _wait(operation: str):
+    delay = LATENCY.get(operation, 0.0)
+    if delay:
+        time.sleep(delay)
+
+class BirkiniClient:
+    def __init__(self, api_key: str = None):
+        self.api_key = api_key
+
+# Number of records every fake dataset contains.
+RECORD_COUNT = 100
+
+class DatasetFetcher:
+    def __init__(self, client: BirkiniClient):
+        self.client = client
+
+    def _metadata(self, dataset_id: str) -> Dict[str, Any]:
+        return {"id": dataset_id, "title": f"Dataset {dataset_id}", "version": 1}
+
+    def fetch(self, dataset_id: str) -> Dict[str, Any]:
+        _wait("fetch")
+        return {
+            "metadata": self._metadata(dataset_id),
+            "records": [{"row": i, "value": f"{dataset_id}_{i}"} for i in range(RECORD_COUNT)],
+        }
+
+    def iter_chunks(self, dataset_id: str, chunk_size: int = 10000) -> Iterator[Dict[str, Any]]:
+        for start in range(0, RECORD_COUNT, chunk_size):
+            _wait("fetch")
+            stop = min(start + chunk_size, RECORD_COUNT)
+            yield {
+                "metadata": self._metadata(dataset_id),
+                "records": [{"row": i, "value": f"{dataset_id}_{i}"} for i in range(start, stop)],
+            }
+
+class ZKProofEngine:
+    def __init__(self):
+        self.calls = 0
+
+    def generate_proof(self, dataset: Dict[str, Any]) -> str:
+        _wait("prove")
+        self.calls += 1
+        return hashlib.sha256(json.dumps(dataset, sort_keys=True, default=str).encode()).hexdigest()
+
+class MCPClient:
+    def __init__(self):
+        self.connected = False
+        self.resources: Dict[str, Any] = {}
+        self.lock = threading.Lock()
+
+    def connect(self):
+        _wait("connect")
+        self.connected = True
+
+    def register_resource(self, context_id: str, resource: Any):
+        if not self.connected:
+            raise RuntimeError("MCP client is not connected")
+        _wait("register")
+        with self.lock:
+            self.resources[context_id] = resource
+
+class ZKMCPModule:
+    def __init__(self, mcp_client: MCPClient):
+        self.mcp_client = mcp_client
+        self.privacy_mode = False
+        self.bound: Dict[str, Any] = {}
+
+    def enable_privacy_mode(self):
+        self.privacy_mode = True
+
+    def bind_proof(self, context_id: str, proof: Any):
+        _wait("bind")
+        self.bound[context_id] = proof
+
+class ContextualQueryBuilder:
+    def __init__(self, mcp_client: MCPClient):
+        self.mcp_client = mcp_client
+
+    def build(self, query: str, context_id: str) -> Dict[str, Any]:
+        return {"query": query, "context_id": context_id}
+
+class PrivacyPreservingAnalyzer:
+    def __init__(self, mcp_client: MCPClient, zk_engine: ZKProofEngine):
+        self.mcp_client = mcp_client
+        self.zk_engine = zk_engine
+        self.calls = 0
+
+    def analyze(self, contextual_query: Dict[str, Any]) -> Dict[str, Any]:
+        _wait("analyze")
+        self.calls += 1
+        return {"query": contextual_query["query"], "context_id": contextual_query["context_id"], "rows": 3}
+
+# === Model routing ===
+
+# Per-model execution latency overrides (seconds); others use LATENCY["execute"].
+MODEL_LATENCY: Dict[Any, float] = {}
+MODEL_COUNT = 50
+_TASKS: Dict[str, Any] = {}
+_TASKS_LOCK = threading.Lock()
+
+class ZKMetaValidator:
+    def __init__(self):
+        self.calls = 0
+
+    def verify_metadata(self, zk_meta: Dict[str, Any]) -> bool:
+        self.calls += 1
+        return bool(zk_meta.get("valid", True))
+
+class ModelRegistry:
+    def __init__(self, client: BirkiniClient):
+        self.client = client
+        self.calls = 0
+
+    def filter_models(self, task_type: str):
+        self.calls += 1
+        rng = random.Random(task_type)
+        return [
+            {
+                "id": f"model_{i:04d}",
+                "name": f"{task_type}-model-{i}",
+                "zk_meta": {"model": i, "valid": i % 10 != 9},
+                "uptime": rng.random(),
+                "response_rate": rng.random(),
+                "context_trust": rng.random(),
+            }
+            for i in range(MODEL_COUNT)
+        ]
+
+class TaskRouter:
+    def __init__(self, mcp_client: MCPClient):
+        self.mcp_client = mcp_client
+
+    def send_task(self, task_id: str, model_id: Any, payload: Dict[str, Any]):
+        with _TASKS_LOCK:
+            _TASKS[task_id] = (model_id, payload)
+
+class ExecutionMonitor:
+    def await_result(self, task_id: str) -> Dict[str, Any]:
+        with _TASKS_LOCK:
+            model_id, payload = _TASKS.pop(task_id)
+        delay = MODEL_LATENCY.get(model_id, LATENCY["execute"])
+        if delay:
+            time.sleep(delay)
+        return {"task_id": task_id, "model_id": model_id, "output": f"processed {len(payload)} fields"}
+
+def install(**latency: float) -> types.ModuleType:
+    """Register this module as `birkini.sdk` (and set optional latencies, e.g. install(prove=0.05))."""
+    LATENCY.update(latency)
+    package = sys.modules.setdefault("birkini", types.ModuleType("birkini"))
+    module = sys.modules[__name__]
+    package.sdk = module
+    sys.modules["birkini.sdk"] = module
+    return module
+
+if __name__ == "__main__":
+    install(execute=0.02)
+    import logging
+    import modelrtr
+    import PIPELINE
+
+    logging.getLogger().setLevel(logging.WARNING)
+    pipeline = PIPELINE.BirkiniPipeline(api_key="local", proof_cache=PIPELINE.ProofCache())
+    pipeline.initialize_clients()
+    dataset_ids = [f"dataset_{i}" for i in range(64)]
+    start = time.perf_counter()
+    runs = pipeline.run_many(dataset_ids, max_datasets=4, max_workers=8)
+    elapsed = time.perf_counter() - start
+    print(f"[Benchmark] run_many {len(dataset_ids) / elapsed:,.1f} datasets/s "
+          f"({sum(run.ok for run in runs)}/{len(runs)} ok)")
+
+    service = modelrtr.ModelRouterService(api_key="local", per_model_limit=4)
+    modelrtr.benchmark_dispatch(service, "text_summarization", tasks=400)
+    service.shutdown()
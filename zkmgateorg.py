@@ -2,7 +2,8 @@ import hashlib
 import random
 import json
 import time
-from typing import Dict, Any, Tuple
+from collections.abc import MutableMapping
+from typing import Dict, Any, Tuple, Optional
 from dataclasses import dataclass, field
 
 # === Simulated cryptographic primitives ===
@@ -44,9 +45,11 @@ class MCPMessage:
 # === ZKMCP Gateway ===
 
 class ZKMCPGateway:
-    def __init__(self):
+    def __init__(self, message_log: Optional[MutableMapping] = None, proof_log: Optional[MutableMapping] = None):
+        # Pass log_store.BoundedLogStore instances to cap memory on long-running gateways.
         self.registered_clients: Dict[str, str] = {}  # sender_id: public_key (simulated)
-        self.message_log: Dict[str, MCPMessage] = {}  # message_id: message
+        self.message_log: MutableMapping[str, MCPMessage] = {} if message_log is None else message_log  # message_id: message
+        self.proof_log: MutableMapping[str, Tuple[str, str]] = {} if proof_log is None else proof_log  # message_id: (statement, proof)
 
     def register_client(self, sender_id: str, public_key: str):
         self.registered_clients[sender_id] = public_key
@@ -74,6 +77,7 @@ class ZKMCPGateway:
         witness = msg.signature
 
         proof = generate_zk_proof(statement, witness)
+        self.proof_log[msg_id] = (statement, proof)
         return statement, proof
 
     def verify_external_proof(self, statement: str, proof: str) -> bool:
@@ -3,11 +3,16 @@ import random
 import json
 import time
 import uuid
-from typing import Dict, Any, Tuple, List
+import struct
+import math
+from collections import ChainMap
+from collections.abc import MutableMapping
+from typing import Dict, Any, Tuple, List, Optional, Callable
 from dataclasses import dataclass, field
 import threading
 import logging
 import queue
+import concurrent.futures
 
 # === Logging Setup ===
 logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)s] %(message)s')
@@ -23,9 +28,65 @@ def generate_commitment(secret: str, nonce: str) -> str:
 def generate_zk_proof(statement: str, witness: str) -> str:
     return sha256("PROOF|" + statement + "|" + witness)
 
-def verify_zk_proof(statement: str, proof: str) -> bool:
+def verify_zk_proof(statement: str, proof: str, root: Optional[str] = None,
+                    path: Optional[List[Tuple[str, str]]] = None) -> bool:
+    """
+    Check a proof. When a Merkle root is given, the (statement, proof) pair
+    is verified by its inclusion `path` under that root instead of the
+    statement check; the caller must only pass roots it trusts, e.g. those
+    a ProofBatcher published.
+    """
+    if root is not None:
+        return path is not None and verify_merkle_path(statement, proof, path, root)
     return proof.startswith(sha256("PROOF|" + statement)[:10])
 
+# === Merkle Proof Commitments ===
+
+def merkle_leaf(statement: str, proof: str) -> str:
+    # The statement is part of the leaf, so an inclusion path binds the proof to what it proves
+    return sha256("LEAF|" + statement + "|" + proof)
+
+def merkle_node(left: str, right: str) -> str:
+    return sha256("NODE|" + left + right)
+
+def build_merkle_levels(entries: List[Tuple[str, str]]) -> List[List[str]]:
+    """
+    Return every tree level from (statement, proof) leaves to root. Unpaired
+    nodes are promoted, not duplicated.
+    """
+    if not entries:
+        raise ValueError("Cannot build a Merkle tree without proofs")
+    levels = [[merkle_leaf(statement, proof) for statement, proof in entries]]
+    while len(levels[-1]) > 1:
+        level = levels[-1]
+        parents = [merkle_node(level[i], level[i + 1]) for i in range(0, len(level) - 1, 2)]
+        if len(level) % 2:
+            parents.append(level[-1])
+        levels.append(parents)
+    return levels
+
+def merkle_inclusion_path(levels: List[List[str]], index: int) -> List[Tuple[str, str]]:
+    """Sibling hashes from leaf to root as (side, hash) pairs, side being 'L' or 'R' for the sibling."""
+    path = []
+    for level in levels[:-1]:
+        sibling = index ^ 1
+        if sibling < len(level):
+            path.append(("L" if sibling < index else "R", level[sibling]))
+        index //= 2
+    return path
+
+def verify_merkle_path(statement: str, proof: str, path: List[Tuple[str, str]], root: str) -> bool:
+    node = merkle_leaf(statement, proof)
+    for side, sibling in path:
+        node = merkle_node(sibling, node) if side == "L" else merkle_node(node, sibling)
+    return node == root
+
+def generate_zk_proof_batch(pairs: List[Tuple[str, str]]) -> Tuple[str, List[str], List[List[Tuple[str, str]]]]:
+    """Prove (statement, witness) pairs and commit to them with one Merkle root. Returns (root, proofs, paths)."""
+    proofs = [generate_zk_proof(statement, witness) for statement, witness in pairs]
+    levels = build_merkle_levels([(statement, proof) for (statement, _), proof in zip(pairs, proofs)])
+    return levels[-1][0], proofs, [merkle_inclusion_path(levels, i) for i in range(len(proofs))]
+
 def generate_nonce() -> str:
     return str(uuid.uuid4())
 
@@ -50,22 +111,248 @@ class MCPMessage:
         expected_sig = self._sign_message()
         return self.signature == expected_sig
 
+class CompactMCPMessage:
+    """
+    Slotted MCP message that keeps its signature as a raw 32-byte digest and
+    memoizes its canonical encoding, so validation never re-serializes the
+    payload. Signatures and msg_ids match MCPMessage for the same fields.
+
+    Wire format (big-endian): timestamp f64, sender/nonce lengths u16,
+    payload length u32, then sender, nonce, payload JSON and the digest.
+    Messages parsed from the wire keep memoryview slices of the buffer and
+    only decode the payload JSON when .payload is first accessed.
+    """
+
+    __slots__ = ("sender_id", "timestamp", "nonce", "digest", "_payload", "_payload_bytes", "_canonical")
+
+    WIRE_HEADER = struct.Struct(">dHHI")
+    DIGEST_SIZE = 32
+
+    def __init__(self, sender_id: str, timestamp: float, payload: Optional[Dict[str, Any]], nonce: str,
+                 digest: Optional[bytes] = None, payload_bytes: Optional[bytes | memoryview] = None):
+        self.sender_id = sender_id
+        self.timestamp = timestamp
+        self.nonce = nonce
+        self._payload = payload
+        self._payload_bytes = json.dumps(payload).encode() if payload_bytes is None else payload_bytes
+        self._canonical: Optional[bytes] = None
+        self.digest = hashlib.sha256(self.canonical_bytes()).digest() if digest is None else bytes(digest)
+
+    @classmethod
+    def from_message(cls, message: MCPMessage) -> "CompactMCPMessage":
+        return cls(message.sender_id, message.timestamp, message.payload, message.nonce,
+                   digest=bytes.fromhex(message.signature))
+
+    @classmethod
+    def from_wire(cls, data: bytes | memoryview) -> "CompactMCPMessage":
+        view = memoryview(data)
+        header_size = cls.WIRE_HEADER.size
+        if len(view) < header_size:
+            raise ValueError("Truncated MCP message header")
+        timestamp, sender_len, nonce_len, payload_len = cls.WIRE_HEADER.unpack_from(view)
+        payload_start = header_size + sender_len + nonce_len
+        digest_start = payload_start + payload_len
+        if len(view) != digest_start + cls.DIGEST_SIZE:
+            raise ValueError("MCP message length does not match its header")
+        return cls(
+            sender_id=str(view[header_size:header_size + sender_len], "utf-8"),
+            timestamp=timestamp,
+            payload=None,
+            nonce=str(view[header_size + sender_len:payload_start], "utf-8"),
+            digest=view[digest_start:],
+            payload_bytes=view[payload_start:digest_start],
+        )
+
+    def to_wire(self) -> bytes:
+        sender = self.sender_id.encode()
+        nonce = self.nonce.encode()
+        return b"".join((
+            self.WIRE_HEADER.pack(self.timestamp, len(sender), len(nonce), len(self._payload_bytes)),
+            sender, nonce, self._payload_bytes, self.digest,
+        ))
+
+    @property
+    def payload(self) -> Dict[str, Any]:
+        if self._payload is None:
+            self._payload = json.loads(bytes(self._payload_bytes))
+        return self._payload
+
+    @property
+    def signature(self) -> str:
+        return self.digest.hex()
+
+    def canonical_bytes(self) -> bytes:
+        if self._canonical is None:
+            self._canonical = b"|".join((
+                self.sender_id.encode(), str(self.timestamp).encode(), self._payload_bytes, self.nonce.encode()
+            ))
+        return self._canonical
+
+    def validate_signature(self) -> bool:
+        return hashlib.sha256(self.canonical_bytes()).digest() == self.digest
+
+    def __reduce__(self):
+        return CompactMCPMessage.from_wire, (self.to_wire(),)
+
+def derive_msg_id(msg: MCPMessage | CompactMCPMessage) -> str:
+    return hashlib.sha256(f"{msg.signature}{msg.timestamp}".encode()).hexdigest()
+
+def proof_statement(msg: MCPMessage | CompactMCPMessage) -> str:
+    return f"{msg.sender_id}|{msg.payload['action']}"
+
+def has_valid_payload(msg: MCPMessage | CompactMCPMessage) -> bool:
+    """The payload must decode to a JSON object with an "action" key, which proof_statement relies on."""
+    try:
+        payload = msg.payload
+    except ValueError:
+        return False
+    return isinstance(payload, dict) and "action" in payload
+
+# === Replay Protection ===
+
+class BloomFilter:
+    """Fixed-size Bloom filter using double hashing over one BLAKE2b digest."""
+
+    def __init__(self, expected_items: int, false_positive_rate: float = 0.01):
+        self.size, self.hash_count = self.dimensions(expected_items, false_positive_rate)
+        self.bits = bytearray((self.size + 7) // 8)
+
+    @staticmethod
+    def dimensions(expected_items: int, false_positive_rate: float = 0.01) -> Tuple[int, int]:
+        """(bit count, hash count) for a filter sized for `expected_items`."""
+        expected_items = max(1, expected_items)
+        size = max(8, int(-expected_items * math.log(false_positive_rate) / (math.log(2) ** 2)))
+        return size, max(1, round(size / expected_items * math.log(2)))
+
+    @staticmethod
+    def probes(key: bytes, size: int, hash_count: int) -> List[Tuple[int, int]]:
+        """(byte index, bit mask) for each hash of `key`; shared by every filter with the same dimensions."""
+        digest = hashlib.blake2b(key, digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        positions = [(h1 + i * h2) % size for i in range(hash_count)]
+        return [(position >> 3, 1 << (position & 7)) for position in positions]
+
+    def add(self, key: bytes, probes: Optional[List[Tuple[int, int]]] = None):
+        for index, mask in probes if probes is not None else self.probes(key, self.size, self.hash_count):
+            self.bits[index] |= mask
+
+    def might_contain(self, key: bytes, probes: Optional[List[Tuple[int, int]]] = None) -> bool:
+        bits = self.bits
+        for index, mask in probes if probes is not None else self.probes(key, self.size, self.hash_count):
+            if not bits[index] & mask:
+                return False
+        return True
+
+class NonceIndex:
+    """
+    Replay index keyed on (sender_id, nonce). Entries live in time buckets
+    derived from the message timestamp; buckets older than the acceptance
+    window are dropped whole, so memory and lookups stay bounded by the
+    traffic inside the window. Messages whose timestamp falls outside the
+    window are rejected outright. With use_bloom each bucket keeps a Bloom
+    filter that short-circuits the exact-set probe for unseen keys; a key is
+    hashed once per check and its probes tested against every bucket. In
+    CPython the plain set probes are still cheaper, hence off by default.
+
+    Not thread-safe on its own; the gateway calls it under its lock.
+    """
+
+    def __init__(self, window_seconds: float = 300.0, bucket_seconds: float = 30.0,
+                 use_bloom: bool = False, expected_per_bucket: int = 100000):
+        if window_seconds <= 0 or bucket_seconds <= 0:
+            raise ValueError("window_seconds and bucket_seconds must be positive")
+        self.window_seconds = window_seconds
+        self.bucket_seconds = bucket_seconds
+        self.use_bloom = use_bloom
+        self.expected_per_bucket = expected_per_bucket
+        # Every bucket's filter has the same dimensions, so a key's probes are hashed once per check
+        self.bloom_dimensions = BloomFilter.dimensions(expected_per_bucket)
+        self.buckets: Dict[int, set] = {}
+        self.blooms: Dict[int, BloomFilter] = {}
+        self.replays = 0
+        self.expired = 0
+
+    def _expire(self, now: float):
+        oldest = int((now - self.window_seconds) // self.bucket_seconds)
+        for bucket_id in [b for b in self.buckets if b < oldest]:
+            del self.buckets[bucket_id]
+            self.blooms.pop(bucket_id, None)
+
+    def _seen(self, key: Tuple[str, str], encoded: bytes, probes: Optional[List[Tuple[int, int]]]) -> bool:
+        for bucket_id, keys in self.buckets.items():
+            if probes is not None and not self.blooms[bucket_id].might_contain(encoded, probes):
+                continue
+            if key in keys:
+                return True
+        return False
+
+    def check_and_add(self, sender_id: str, nonce: str, timestamp: float, now: Optional[float] = None) -> bool:
+        """Record the nonce and return True if it is fresh; False for replays or out-of-window timestamps."""
+        now = time.time() if now is None else now
+        if abs(now - timestamp) > self.window_seconds:
+            self.expired += 1
+            return False
+
+        self._expire(now)
+        key = (sender_id, nonce)
+        encoded = f"{sender_id}|{nonce}".encode() if self.use_bloom else b""
+        probes = BloomFilter.probes(encoded, *self.bloom_dimensions) if self.use_bloom else None
+        if self._seen(key, encoded, probes):
+            self.replays += 1
+            return False
+
+        bucket_id = int(timestamp // self.bucket_seconds)
+        bucket = self.buckets.get(bucket_id)
+        if bucket is None:
+            bucket = self.buckets[bucket_id] = set()
+            if self.use_bloom:
+                self.blooms[bucket_id] = BloomFilter(self.expected_per_bucket)
+        bucket.add(key)
+        if self.use_bloom:
+            self.blooms[bucket_id].add(encoded, probes)
+        return True
+
+    def __len__(self) -> int:
+        return sum(len(keys) for keys in self.buckets.values())
+
 # === ZKMCP Gateway Implementation ===
 
 class ZKMCPGateway:
-    def __init__(self):
+    def __init__(self, message_log: Optional[MutableMapping] = None, proof_log: Optional[MutableMapping] = None,
+                 proof_batcher: Optional["ProofBatcher"] = None, nonce_index: Optional[NonceIndex] = None):
+        # Pass log_store.BoundedLogStore instances to cap memory on long-running gateways.
         self.registered_clients: Dict[str, str] = {}
-        self.message_log: Dict[str, MCPMessage] = {}
-        self.proof_log: Dict[str, Tuple[str, str]] = {}
+        self.message_log: MutableMapping[str, MCPMessage] = {} if message_log is None else message_log
+        self.proof_log: MutableMapping[str, Tuple[str, str]] = {} if proof_log is None else proof_log
         self.processing_queue: queue.Queue = queue.Queue()
         self.lock = threading.Lock()
+        # Cleared by ProofWorkerPool when processing_queue passes its high-water mark.
+        self.accepting = threading.Event()
+        self.accepting.set()
+        self.backpressure_timeout: float = 5.0
+        self.proof_batcher = proof_batcher
+        self.nonce_index = nonce_index
 
     def register_client(self, sender_id: str, public_key: str):
         with self.lock:
             self.registered_clients[sender_id] = public_key
             logging.info(f"Registered client: {sender_id}")
 
-    def receive_message(self, message: MCPMessage) -> Tuple[bool, str]:
+    def receive_wire(self, data: bytes | memoryview) -> Tuple[bool, str]:
+        """Parse a CompactMCPMessage wire frame and pass it to receive_message."""
+        try:
+            message = CompactMCPMessage.from_wire(data)
+        except (ValueError, struct.error, UnicodeDecodeError):
+            return False, "Malformed message"
+        return self.receive_message(message)
+
+    def receive_message(self, message: MCPMessage | CompactMCPMessage) -> Tuple[bool, str]:
+        if not self.accepting.is_set() and not self.accepting.wait(self.backpressure_timeout):
+            return False, "Gateway overloaded"
+
+        # Decoding the payload is the costly part of the shape check, so it stays outside the lock
+        well_formed = has_valid_payload(message)
         with self.lock:
             if message.sender_id not in self.registered_clients:
                 return False, "Unauthorized sender"
@@ -73,27 +360,106 @@ class ZKMCPGateway:
             if not message.validate_signature():
                 return False, "Invalid signature"
 
-            msg_id = sha256(message.signature + str(message.timestamp))
+            if not well_formed:
+                return False, "Malformed message"
+
+            if self.nonce_index is not None and not self.nonce_index.check_and_add(
+                    message.sender_id, message.nonce, message.timestamp):
+                return False, "Replayed or expired message"
+
+            msg_id = derive_msg_id(message)
             self.message_log[msg_id] = message
             self.processing_queue.put(msg_id)
 
             logging.info(f"Message received and verified from {message.sender_id}")
             return True, msg_id
 
+    def receive_batch(self, messages: List[MCPMessage | CompactMCPMessage]) -> List[Tuple[bool, str]]:
+        """
+        Accept a burst of messages in one pass. Signatures and msg_ids are
+        computed before taking the lock; authorization, logging and queueing
+        then happen under a single lock acquisition. Returns one
+        receive_message-style (ok, msg_id_or_reason) tuple per message, in order.
+        """
+        if not self.accepting.is_set() and not self.accepting.wait(self.backpressure_timeout):
+            return [(False, "Gateway overloaded")] * len(messages)
+
+        msg_ids = [derive_msg_id(message) if message.validate_signature() else None for message in messages]
+        well_formed = [has_valid_payload(message) for message in messages]
+
+        results: List[Tuple[bool, str]] = []
+        accepted = 0
+        with self.lock:
+            clients = self.registered_clients
+            message_log = self.message_log
+            enqueue = self.processing_queue.put
+            nonce_index = self.nonce_index
+            now = time.time()
+            for message, msg_id, ok in zip(messages, msg_ids, well_formed):
+                if message.sender_id not in clients:
+                    results.append((False, "Unauthorized sender"))
+                elif msg_id is None:
+                    results.append((False, "Invalid signature"))
+                elif not ok:
+                    results.append((False, "Malformed message"))
+                elif nonce_index is not None and not nonce_index.check_and_add(
+                        message.sender_id, message.nonce, message.timestamp, now):
+                    results.append((False, "Replayed or expired message"))
+                else:
+                    message_log[msg_id] = message
+                    enqueue(msg_id)
+                    results.append((True, msg_id))
+                    accepted += 1
+
+        logging.info(f"Batch received: {accepted}/{len(messages)} messages verified")
+        return results
+
     def create_zk_proof_for_msg(self, msg_id: str) -> Tuple[str, str]:
         with self.lock:
             if msg_id not in self.message_log:
                 raise ValueError("Message ID not found")
 
             msg = self.message_log[msg_id]
-            statement = f"{msg.sender_id}|{msg.payload['action']}"
+            statement = proof_statement(msg)
             witness = msg.signature
             proof = generate_zk_proof(statement, witness)
             self.proof_log[msg_id] = (statement, proof)
+            if self.proof_batcher is not None:
+                self.proof_batcher.add(msg_id, statement, proof)
 
             logging.info(f"ZK Proof created for message ID {msg_id}")
             return statement, proof
 
+    def collect_proof_inputs(self, msg_ids: List[str]) -> List[Tuple[str, str, str]]:
+        """Resolve (msg_id, statement, witness) for a batch under a single lock acquisition."""
+        with self.lock:
+            inputs = []
+            for msg_id in msg_ids:
+                msg = self.message_log.get(msg_id)
+                if msg is None:
+                    logging.warning(f"Skipping proof for unknown message ID {msg_id}")
+                    continue
+                try:
+                    inputs.append((msg_id, proof_statement(msg), msg.signature))
+                except (KeyError, TypeError, ValueError) as e:
+                    # One malformed payload must not cost the rest of the batch its proofs
+                    logging.warning(f"Skipping proof for malformed message ID {msg_id}: {e!r}")
+            return inputs
+
+    def record_proofs(self, results: List[Tuple[str, str, str]]):
+        """Store a batch of (msg_id, statement, proof) results under a single lock acquisition."""
+        with self.lock:
+            for msg_id, statement, proof in results:
+                self.proof_log[msg_id] = (statement, proof)
+            if self.proof_batcher is not None:
+                self.proof_batcher.add_many(results)
+
+    def get_inclusion_proof(self, msg_id: str) -> Optional[Tuple[str, List[Tuple[str, str]]]]:
+        """(root, path) for a batched proof, or None if batching is off or its window is still open."""
+        if self.proof_batcher is None:
+            return None
+        return self.proof_batcher.inclusion_proof(msg_id)
+
     def verify_external_proof(self, statement: str, proof: str) -> bool:
         is_valid = verify_zk_proof(statement, proof)
         status = "valid" if is_valid else "invalid"
@@ -101,19 +467,294 @@ class ZKMCPGateway:
         return is_valid
 
     def background_processor(self):
-        while True:
+        pool = ProofWorkerPool(self, workers=1)
+        pool.start()
+        pool.join()
+
+# === Proof Worker Pool ===
+
+def prove_batch(inputs: List[Tuple[str, str, str]]) -> List[Tuple[str, str, str]]:
+    """
+    Generate proofs for (msg_id, statement, witness) tuples and return
+    (msg_id, statement, proof). Picklable for process pools. Proofs are
+    committed to a Merkle root by the gateway's ProofBatcher, which is where
+    they can be verified.
+    """
+    proven = []
+    for msg_id, statement, witness in inputs:
+        try:
+            proven.append((msg_id, statement, generate_zk_proof(statement, witness)))
+        except Exception as e:
+            logging.warning(f"Skipping proof for message ID {msg_id}: {e!r}")
+    return proven
+
+class ProofWorkerPool:
+    """
+    Drains a gateway's processing_queue in batches and generates/verifies the
+    proofs in parallel on a thread or process executor. Stops the gateway from
+    accepting messages while the queue is above `high_water_mark` and resumes
+    once it falls back to `low_water_mark`.
+    """
+
+    def __init__(self, gateway: ZKMCPGateway, workers: int = 4, backend: str = "thread",
+                 batch_size: int = 256, high_water_mark: int = 10000,
+                 low_water_mark: Optional[int] = None, poll_interval: float = 0.5):
+        if backend not in ("thread", "process"):
+            raise ValueError("backend must be 'thread' or 'process'")
+        if workers < 1 or batch_size < 1:
+            raise ValueError("workers and batch_size must be at least 1")
+
+        self.gateway = gateway
+        self.workers = workers
+        self.backend = backend
+        self.batch_size = batch_size
+        self.high_water_mark = high_water_mark
+        self.low_water_mark = high_water_mark // 2 if low_water_mark is None else low_water_mark
+        self.poll_interval = poll_interval
+        self.processed = 0
+
+        self._executor: Optional[concurrent.futures.Executor] = None
+        self._dispatcher: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+        self._drain = True
+
+    def start(self):
+        if self._dispatcher is not None:
+            raise RuntimeError("Worker pool already started")
+        if self.backend == "process":
+            self._executor = concurrent.futures.ProcessPoolExecutor(max_workers=self.workers)
+        else:
+            self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.workers)
+        self._dispatcher = threading.Thread(target=self._run, daemon=True)
+        self._dispatcher.start()
+        logging.info(f"Proof worker pool started ({self.workers} {self.backend} workers)")
+
+    def join(self, timeout: Optional[float] = None):
+        if self._dispatcher is not None:
+            self._dispatcher.join(timeout)
+
+    def shutdown(self, drain: bool = True, timeout: Optional[float] = None):
+        """Stop the pool. With drain=True every queued msg_id is proven before returning."""
+        self._drain = drain
+        self._stopping.set()
+        self.join(timeout)
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+        self.gateway.accepting.set()
+        if self.gateway.proof_batcher is not None:
+            self.gateway.proof_batcher.flush()
+        logging.info(f"Proof worker pool stopped ({self.processed} proofs)")
+
+    def _next_batch(self) -> List[str]:
+        try:
+            batch = [self.gateway.processing_queue.get(timeout=self.poll_interval)]
+        except queue.Empty:
+            return []
+        while len(batch) < self.batch_size:
             try:
-                msg_id = self.processing_queue.get(timeout=5)
-                statement, proof = self.create_zk_proof_for_msg(msg_id)
-                self.verify_external_proof(statement, proof)
-                time.sleep(1)
+                batch.append(self.gateway.processing_queue.get_nowait())
             except queue.Empty:
+                break
+        return batch
+
+    def _update_backpressure(self):
+        pending = self.gateway.processing_queue.qsize()
+        if pending >= self.high_water_mark and self.gateway.accepting.is_set():
+            logging.warning(f"Processing queue at {pending} messages, applying backpressure")
+            self.gateway.accepting.clear()
+        elif pending <= self.low_water_mark and not self.gateway.accepting.is_set():
+            logging.info(f"Processing queue down to {pending} messages, releasing backpressure")
+            self.gateway.accepting.set()
+
+    def _run(self):
+        while True:
+            if self._stopping.is_set() and not self._drain:
+                break
+            batch = self._next_batch()
+            self._update_backpressure()
+            if self.gateway.proof_batcher is not None:
+                self.gateway.proof_batcher.flush_expired()
+            if not batch:
+                if self._stopping.is_set():
+                    break
                 continue
+            try:
+                self._process(batch)
+            except Exception as e:
+                logging.error(f"Proof batch of {len(batch)} messages failed: {e}")
+            finally:
+                for _ in batch:
+                    self.gateway.processing_queue.task_done()
+
+    def _process(self, batch: List[str]):
+        inputs = self.gateway.collect_proof_inputs(batch)
+        chunk_size = max(1, -(-len(inputs) // self.workers))
+        chunks = [inputs[i:i + chunk_size] for i in range(0, len(inputs), chunk_size)]
+        for results in self._executor.map(prove_batch, chunks):
+            self.gateway.record_proofs(results)
+            self.processed += len(results)
+        logging.info(f"ZK Proofs created for {len(inputs)} messages")
+
+# === Merkle Proof Batching ===
+
+class ProofBatcher:
+    """
+    Collects proofs over a size or time window and seals each window into a
+    single published Merkle root. Every msg_id in a sealed window gets a
+    compact inclusion path, so verifying N messages costs one root check plus
+    log N hashes each instead of N independent proof lookups.
+    """
+
+    def __init__(self, max_batch_size: int = 1024, window_seconds: float = 1.0,
+                 inclusions: Optional[MutableMapping] = None,
+                 on_publish: Optional[Callable[[str, int], None]] = None):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        self.max_batch_size = max_batch_size
+        self.window_seconds = window_seconds
+        self.on_publish = on_publish
+        self.roots: Dict[str, int] = {}  # published root: number of proofs
+        self.inclusions: MutableMapping[str, Tuple[str, List[Tuple[str, str]]]] = {} if inclusions is None else inclusions
+        self.lock = threading.Lock()
+        self._pending: List[Tuple[str, str, str]] = []
+        self._window_started: Optional[float] = None
+
+    def add(self, msg_id: str, statement: str, proof: str) -> Optional[str]:
+        return self.add_many([(msg_id, statement, proof)])
+
+    def add_many(self, entries: List[Tuple[str, str, str]]) -> Optional[str]:
+        """Queue (msg_id, statement, proof) entries; returns the last root sealed as a result, if any."""
+        root = None
+        with self.lock:
+            for entry in entries:
+                if self._window_started is None:
+                    self._window_started = time.monotonic()
+                self._pending.append(entry)
+                if len(self._pending) >= self.max_batch_size:
+                    root = self._seal()
+            if self._window_expired():
+                root = self._seal()
+        return root
+
+    def flush_expired(self) -> Optional[str]:
+        with self.lock:
+            return self._seal() if self._window_expired() else None
+
+    def flush(self) -> Optional[str]:
+        with self.lock:
+            return self._seal() if self._pending else None
+
+    def _window_expired(self) -> bool:
+        return (self._pending and self._window_started is not None
+                and time.monotonic() - self._window_started >= self.window_seconds)
+
+    def _seal(self) -> str:
+        pending, self._pending, self._window_started = self._pending, [], None
+        levels = build_merkle_levels([(statement, proof) for _, statement, proof in pending])
+        root = levels[-1][0]
+        for index, (msg_id, _, _) in enumerate(pending):
+            self.inclusions[msg_id] = (root, merkle_inclusion_path(levels, index))
+        self.roots[root] = len(pending)
+        logging.info(f"Published Merkle root {root} for {len(pending)} proofs")
+        if self.on_publish is not None:
+            self.on_publish(root, len(pending))
+        return root
+
+    def inclusion_proof(self, msg_id: str) -> Optional[Tuple[str, List[Tuple[str, str]]]]:
+        return self.inclusions.get(msg_id)
+
+    def verify(self, msg_id: str, statement: str, proof: str) -> bool:
+        """Check that `proof` for `statement` is committed under a root this batcher published."""
+        inclusion = self.inclusion_proof(msg_id)
+        if inclusion is None:
+            return False
+        root, path = inclusion
+        return root in self.roots and verify_zk_proof(statement, proof, root, path)
+
+# === Sharded Gateway ===
+
+class ShardedZKMCPGateway:
+    """
+    Gateway front end that partitions client, message and proof state by a
+    hash of sender_id. Every shard is a full ZKMCPGateway with its own lock
+    and processing queue, so senders on different shards never contend.
+    """
+
+    def __init__(self, shard_count: int = 8, gateway_factory: Callable[[], ZKMCPGateway] = ZKMCPGateway):
+        if shard_count < 1:
+            raise ValueError("shard_count must be at least 1")
+        self.shards: List[ZKMCPGateway] = [gateway_factory() for _ in range(shard_count)]
+
+    @property
+    def registered_clients(self) -> ChainMap:
+        return ChainMap(*(shard.registered_clients for shard in self.shards))
+
+    @property
+    def message_log(self) -> ChainMap:
+        return ChainMap(*(shard.message_log for shard in self.shards))
+
+    @property
+    def proof_log(self) -> ChainMap:
+        return ChainMap(*(shard.proof_log for shard in self.shards))
+
+    def shard_index(self, sender_id: str) -> int:
+        return int.from_bytes(hashlib.sha256(sender_id.encode()).digest()[:8], "big") % len(self.shards)
+
+    def shard_for(self, sender_id: str) -> ZKMCPGateway:
+        return self.shards[self.shard_index(sender_id)]
+
+    def _shard_for_msg(self, msg_id: str) -> Optional[ZKMCPGateway]:
+        # No shard lock needed: dict membership is atomic and BoundedLogStore locks internally.
+        for shard in self.shards:
+            if msg_id in shard.message_log:
+                return shard
+        return None
+
+    def register_client(self, sender_id: str, public_key: str):
+        self.shard_for(sender_id).register_client(sender_id, public_key)
+
+    def receive_message(self, message: MCPMessage | CompactMCPMessage) -> Tuple[bool, str]:
+        return self.shard_for(message.sender_id).receive_message(message)
+
+    def receive_batch(self, messages: List[MCPMessage | CompactMCPMessage]) -> List[Tuple[bool, str]]:
+        """Split a batch by shard, hand each shard its sub-batch and return results in input order."""
+        positions: Dict[int, List[int]] = {}
+        for position, message in enumerate(messages):
+            positions.setdefault(self.shard_index(message.sender_id), []).append(position)
+
+        results: List[Tuple[bool, str]] = [(False, "")] * len(messages)
+        for index, shard_positions in positions.items():
+            shard_results = self.shards[index].receive_batch([messages[p] for p in shard_positions])
+            for position, result in zip(shard_positions, shard_results):
+                results[position] = result
+        return results
+
+    def create_zk_proof_for_msg(self, msg_id: str) -> Tuple[str, str]:
+        shard = self._shard_for_msg(msg_id)
+        if shard is None:
+            raise ValueError("Message ID not found")
+        return shard.create_zk_proof_for_msg(msg_id)
+
+    def verify_external_proof(self, statement: str, proof: str) -> bool:
+        return self.shards[0].verify_external_proof(statement, proof)
+
+    def start_processors(self) -> List[threading.Thread]:
+        """Start one daemon background processor per shard."""
+        threads = []
+        for shard in self.shards:
+            thread = threading.Thread(target=shard.background_processor, daemon=True)
+            thread.start()
+            threads.append(thread)
+        return threads
+
+    def background_processor(self):
+        for thread in self.start_processors():
+            thread.join()
 
 # === Network Simulation for Birkini Protocol ===
 
 class BirkiniNetwork:
-    def __init__(self, gateway: ZKMCPGateway):
+    def __init__(self, gateway: ZKMCPGateway | ShardedZKMCPGateway):
         self.gateway = gateway
         self.nodes: List[str] = []
 
@@ -136,6 +777,149 @@ class BirkiniNetwork:
             self.gateway.receive_message(message)
             time.sleep(0.2)
 
+# === Benchmarks ===
+
+def benchmark_sharded_ingest(shard_counts: Tuple[int, ...] = (1, 2, 4, 8), threads: int = 8,
+                             messages_per_thread: int = 2000, clients: int = 64) -> Dict[int, float]:
+    """
+    Measure receive_message throughput (messages/sec) with `threads` concurrent
+    senders against a ShardedZKMCPGateway for each shard count.
+    """
+    previous_level = logging.getLogger().level
+    logging.getLogger().setLevel(logging.WARNING)
+    results: Dict[int, float] = {}
+    try:
+        for shard_count in shard_counts:
+            gateway = ShardedZKMCPGateway(shard_count=shard_count)
+            senders = [f"node_{i:03d}" for i in range(clients)]
+            for sender in senders:
+                gateway.register_client(sender, sha256(f"public_key_{sender}"))
+
+            batches = [
+                [
+                    MCPMessage(sender_id=senders[(t * messages_per_thread + i) % clients], timestamp=time.time(),
+                               payload={"action": "commit_data", "content": str(i)}, nonce=generate_nonce())
+                    for i in range(messages_per_thread)
+                ]
+                for t in range(threads)
+            ]
+
+            barrier = threading.Barrier(threads + 1)
+
+            def send(batch: List[MCPMessage]):
+                barrier.wait()
+                for message in batch:
+                    gateway.receive_message(message)
+
+            workers = [threading.Thread(target=send, args=(batch,)) for batch in batches]
+            for worker in workers:
+                worker.start()
+            barrier.wait()
+            start = time.perf_counter()
+            for worker in workers:
+                worker.join()
+            elapsed = time.perf_counter() - start
+
+            results[shard_count] = (threads * messages_per_thread) / elapsed
+            print(f"[Benchmark] shards={shard_count:<3} threads={threads} -> {results[shard_count]:,.0f} msg/s")
+    finally:
+        logging.getLogger().setLevel(previous_level)
+    return results
+
+def benchmark_message_encoding(count: int = 20000) -> Dict[str, Dict[str, float]]:
+    """
+    Compare MCPMessage against CompactMCPMessage: per-message CPU for
+    construction plus the two signature checks of the receive path, and
+    serialized bytes (JSON dict vs binary wire frame).
+    """
+    fields = [
+        ("node_%03d" % (i % 64), time.time(), {"action": "commit_data", "content": sha256(str(i))}, generate_nonce())
+        for i in range(count)
+    ]
+    results: Dict[str, Dict[str, float]] = {}
+
+    start = time.perf_counter()
+    messages = [MCPMessage(sender_id=s, timestamp=t, payload=p, nonce=n) for s, t, p, n in fields]
+    for message in messages:
+        message.validate_signature()
+    elapsed = time.perf_counter() - start
+    encoded = sum(len(json.dumps({"sender_id": m.sender_id, "timestamp": m.timestamp, "payload": m.payload,
+                                  "nonce": m.nonce, "signature": m.signature}).encode()) for m in messages)
+    results["dataclass"] = {"us_per_msg": elapsed / count * 1e6, "bytes_per_msg": encoded / count}
+
+    start = time.perf_counter()
+    compact = [CompactMCPMessage(s, t, p, n) for s, t, p, n in fields]
+    for message in compact:
+        message.validate_signature()
+    elapsed = time.perf_counter() - start
+    frames = [message.to_wire() for message in compact]
+    results["compact"] = {"us_per_msg": elapsed / count * 1e6, "bytes_per_msg": sum(map(len, frames)) / count}
+
+    start = time.perf_counter()
+    for frame in frames:
+        CompactMCPMessage.from_wire(frame).validate_signature()
+    elapsed = time.perf_counter() - start
+    results["wire_parse"] = {"us_per_msg": elapsed / count * 1e6, "bytes_per_msg": results["compact"]["bytes_per_msg"]}
+
+    for name, stats in results.items():
+        print(f"[Benchmark] {name:<10} {stats['us_per_msg']:.2f} us/msg, {stats['bytes_per_msg']:.0f} bytes/msg")
+    return results
+
+def benchmark_batch_receive(count: int = 20000, batch_size: int = 256) -> Dict[str, float]:
+    """Compare per-message overhead of receive_message against receive_batch (us/msg)."""
+    previous_level = logging.getLogger().level
+    logging.getLogger().setLevel(logging.WARNING)
+    try:
+        messages = [
+            CompactMCPMessage(f"node_{i % 64:03d}", time.time(), {"action": "commit_data", "content": str(i)}, generate_nonce())
+            for i in range(count)
+        ]
+        results: Dict[str, float] = {}
+
+        gateway = ZKMCPGateway()
+        for i in range(64):
+            gateway.register_client(f"node_{i:03d}", sha256(f"public_key_{i}"))
+        start = time.perf_counter()
+        for message in messages:
+            gateway.receive_message(message)
+        results["single"] = (time.perf_counter() - start) / count * 1e6
+
+        gateway = ZKMCPGateway()
+        for i in range(64):
+            gateway.register_client(f"node_{i:03d}", sha256(f"public_key_{i}"))
+        start = time.perf_counter()
+        for i in range(0, count, batch_size):
+            gateway.receive_batch(messages[i:i + batch_size])
+        results["batch"] = (time.perf_counter() - start) / count * 1e6
+    finally:
+        logging.getLogger().setLevel(previous_level)
+
+    print(f"[Benchmark] receive_message {results['single']:.2f} us/msg | receive_batch({batch_size}) {results['batch']:.2f} us/msg")
+    return results
+
+def benchmark_merkle_verification(batch_sizes: Tuple[int, ...] = (1, 16, 256, 4096)) -> Dict[int, Dict[str, float]]:
+    """Per-message cost of verifying a batch against one published root, by batch size."""
+    results: Dict[int, Dict[str, float]] = {}
+    for size in batch_sizes:
+        pairs = [(f"node_{i % 64:03d}|commit_data", sha256(str(i))) for i in range(size)]
+        root, proofs, paths = generate_zk_proof_batch(pairs)
+        trusted_roots = {root}
+
+        start = time.perf_counter()
+        valid = root in trusted_roots and all(
+            verify_zk_proof(statement, proof, root, path) for (statement, _), proof, path in zip(pairs, proofs, paths))
+        elapsed = time.perf_counter() - start
+
+        results[size] = {
+            "us_per_msg": elapsed / size * 1e6,
+            "hashes_per_msg": 1 + sum(len(path) for path in paths) / size,
+            "path_bytes": sum(len(h) for path in paths for _, h in path) / size,
+            "valid": float(valid),
+        }
+        print(f"[Benchmark] batch={size:<5} {results[size]['us_per_msg']:.2f} us/msg, "
+              f"{results[size]['hashes_per_msg']:.1f} hashes/msg, valid={valid}")
+    return results
+
 # === Simulation Entrypoint ===
 
 def simulate_birkini_protocol_flow():
@@ -143,10 +927,19 @@ def simulate_birkini_protocol_flow():
     network = BirkiniNetwork(gateway)
     network.bootstrap_clients(5)
 
-    processor_thread = threading.Thread(target=gateway.background_processor, daemon=True)
-    processor_thread.start()
+    worker_pool = ProofWorkerPool(gateway, workers=4)
+    worker_pool.start()
 
     network.simulate_traffic(20)
+    worker_pool.shutdown(drain=True)
 
 if __name__ == "__main__":
-    simulate_birkini_protocol_flow()
+    import sys
+
+    if "--bench" in sys.argv:
+        benchmark_sharded_ingest()
+        benchmark_message_encoding()
+        benchmark_batch_receive()
+        benchmark_merkle_verification()
+    else:
+        simulate_birkini_protocol_flow()
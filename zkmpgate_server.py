@@ -0,0 +1,200 @@
+import asyncio
+import logging
+import random
+import struct
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from zkmpgate import (
+    CompactMCPMessage,
+    ProofWorkerPool,
+    ZKMCPGateway,
+    ShardedZKMCPGateway,
+    generate_nonce,
+    sha256,
+)
+
+# === Framing ===
+# Requests:  u32 length | CompactMCPMessage wire frame
+# Responses: u8 status (1 = accepted) | u16 length | msg_id or rejection reason
+
+FRAME_HEADER = struct.Struct(">I")
+RESPONSE_HEADER = struct.Struct(">BH")
+MAX_FRAME_SIZE = 1 << 20
+
+def encode_frame(data: bytes) -> bytes:
+    return FRAME_HEADER.pack(len(data)) + data
+
+async def read_frame(reader: asyncio.StreamReader) -> Optional[bytes]:
+    """Read one length-prefixed frame, or None when the peer closes the connection."""
+    try:
+        header = await reader.readexactly(FRAME_HEADER.size)
+    except asyncio.IncompleteReadError:
+        return None
+    (length,) = FRAME_HEADER.unpack(header)
+    if length > MAX_FRAME_SIZE:
+        raise ValueError(f"Frame of {length} bytes exceeds limit of {MAX_FRAME_SIZE}")
+    return await reader.readexactly(length)
+
+def encode_response(ok: bool, detail: str) -> bytes:
+    body = detail.encode()
+    return RESPONSE_HEADER.pack(1 if ok else 0, len(body)) + body
+
+async def read_response(reader: asyncio.StreamReader) -> Tuple[bool, str]:
+    status, length = RESPONSE_HEADER.unpack(await reader.readexactly(RESPONSE_HEADER.size))
+    return status == 1, (await reader.readexactly(length)).decode()
+
+# === Async Gateway Server ===
+
+class ZKMCPServer:
+    """
+    asyncio TCP front end for a ZKMCPGateway. Frames are parsed on the event
+    loop; receive_message runs on the default executor because it takes the
+    gateway lock and may wait out backpressure, and proof generation runs on
+    a ProofWorkerPool, so neither ever blocks accepts.
+    """
+
+    def __init__(self, gateway: ZKMCPGateway | ShardedZKMCPGateway, host: str = "127.0.0.1", port: int = 8765,
+                 proof_workers: int = 4, proof_backend: str = "thread"):
+        self.gateway = gateway
+        self.host = host
+        self.port = port
+        shards = gateway.shards if isinstance(gateway, ShardedZKMCPGateway) else [gateway]
+        self.worker_pools = [ProofWorkerPool(shard, workers=proof_workers, backend=proof_backend) for shard in shards]
+        self.server: Optional[asyncio.AbstractServer] = None
+        self.connections = 0
+
+    async def start(self):
+        for pool in self.worker_pools:
+            pool.start()
+        self.server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        logging.info(f"ZKMCP server listening on {self.host}:{self.port}")
+
+    async def serve_forever(self):
+        if self.server is None:
+            await self.start()
+        async with self.server:
+            await self.server.serve_forever()
+
+    async def close(self, drain: bool = True):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        loop = asyncio.get_running_loop()
+        for pool in self.worker_pools:
+            await loop.run_in_executor(None, pool.shutdown, drain)
+        logging.info("ZKMCP server stopped")
+
+    def _target(self, message: CompactMCPMessage) -> ZKMCPGateway:
+        if isinstance(self.gateway, ShardedZKMCPGateway):
+            return self.gateway.shard_for(message.sender_id)
+        return self.gateway
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                frame = await read_frame(reader)
+                if frame is None:
+                    break
+                try:
+                    message = CompactMCPMessage.from_wire(frame)
+                except (ValueError, struct.error, UnicodeDecodeError):
+                    ok, detail = False, "Malformed message"
+                else:
+                    ok, detail = await loop.run_in_executor(None, self._target(message).receive_message, message)
+                writer.write(encode_response(ok, detail))
+                await writer.drain()
+        except asyncio.IncompleteReadError as e:
+            logging.warning(f"Closing connection: peer disconnected mid-frame ({len(e.partial)} of {e.expected} bytes)")
+        except (ValueError, ConnectionError) as e:
+            logging.warning(f"Closing connection: {e}")
+        finally:
+            self.connections -= 1
+            writer.close()
+
+# === Async Load Generator ===
+
+class AsyncLoadGenerator:
+    """
+    Async replacement for BirkiniNetwork.simulate_traffic: opens `connections`
+    concurrent client connections and sends signed MCP frames as fast as the
+    server acknowledges them, recording per-message accept latency.
+    """
+
+    def __init__(self, host: str, port: int, nodes: List[str]):
+        self.host = host
+        self.port = port
+        self.nodes = nodes
+
+    def _frame(self) -> bytes:
+        payload = {
+            "action": random.choice(["commit_data", "request_state", "update_record"]),
+            "content": sha256(f"data_{random.randint(0, 10000)}")
+        }
+        message = CompactMCPMessage(random.choice(self.nodes), time.time(), payload, generate_nonce())
+        return encode_frame(message.to_wire())
+
+    async def _client(self, messages: int, latencies: List[float]) -> int:
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        accepted = 0
+        try:
+            for _ in range(messages):
+                frame = self._frame()
+                sent_at = time.perf_counter()
+                writer.write(frame)
+                await writer.drain()
+                ok, _ = await read_response(reader)
+                latencies.append(time.perf_counter() - sent_at)
+                accepted += ok
+        finally:
+            writer.close()
+            await writer.wait_closed()
+        return accepted
+
+    async def run(self, connections: int = 50, messages_per_connection: int = 200) -> Dict[str, Any]:
+        latencies: List[float] = []
+        start = time.perf_counter()
+        accepted = await asyncio.gather(*(self._client(messages_per_connection, latencies) for _ in range(connections)))
+        elapsed = time.perf_counter() - start
+
+        latencies.sort()
+        stats = {
+            "messages": len(latencies),
+            "accepted": sum(accepted),
+            "seconds": elapsed,
+            "msgs_per_sec": len(latencies) / elapsed if elapsed else 0.0,
+            "p50_ms": latencies[int(0.50 * (len(latencies) - 1))] * 1000 if latencies else 0.0,
+            "p99_ms": latencies[int(0.99 * (len(latencies) - 1))] * 1000 if latencies else 0.0,
+        }
+        logging.info(
+            f"Load: {stats['accepted']}/{stats['messages']} accepted in {elapsed:.2f}s "
+            f"({stats['msgs_per_sec']:,.0f} msg/s, p50 {stats['p50_ms']:.2f} ms, p99 {stats['p99_ms']:.2f} ms)"
+        )
+        return stats
+
+# === Localhost Entrypoint ===
+
+async def run_local_load_test(connections: int = 50, messages_per_connection: int = 200,
+                              client_count: int = 5) -> Dict[str, Any]:
+    gateway = ZKMCPGateway()
+    nodes = []
+    for i in range(client_count):
+        client_id = f"node_{i:03d}"
+        gateway.register_client(client_id, sha256(f"public_key_{i}"))
+        nodes.append(client_id)
+
+    server = ZKMCPServer(gateway, port=0)
+    await server.start()
+    try:
+        return await AsyncLoadGenerator(server.host, server.port, nodes).run(connections, messages_per_connection)
+    finally:
+        await server.close(drain=True)
+
+if __name__ == "__main__":
+    # Per-message INFO logs from the gateway would dominate the measurement.
+    logging.getLogger().setLevel(logging.WARNING)
+    stats = asyncio.run(run_local_load_test())
+    print(f"[LoadGen] {stats['msgs_per_sec']:,.0f} msg/s | p50 {stats['p50_ms']:.2f} ms | p99 {stats['p99_ms']:.2f} ms")